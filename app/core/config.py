@@ -1,9 +1,78 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     MONGO_URL: str = "mongodb://localhost:27017"
     SECRET_KEY: str = "supersecretkey"
 
+    # Extra clusters for tenant collections, as JSON: {"cluster_b": "mongodb://..."}.
+    # Master collections and "default_cluster" tenants always use MONGO_URL.
+    MONGO_CLUSTERS: Dict[str, str] = {}
+    # Where new tenants go: "least_loaded", "hash" or "pinned" (see app/db/placement.py)
+    TENANT_PLACEMENT: str = "least_loaded"
+    TENANT_PLACEMENT_PIN: str = "default_cluster"  # cluster used by "pinned"
+
+    # Motor connection pool. On serverless, keep the pool small and idle connections short-lived.
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    # 5s so Vercel doesn't kill the function (default 10s limit)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    # Ping on startup so the first request doesn't pay for DNS/TLS/handshake
+    MONGO_WARMUP_PING: bool = False
+    # Keep one client per process across lifespan cycles / warm invocations instead of closing it
+    SERVERLESS: bool = False
+
+    # Password hashing: bcrypt runs on a bounded worker pool, off the event loop
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_POOL_KIND: str = "thread"  # "thread" or "process"
+    BCRYPT_POOL_SIZE: int = 4
+    BCRYPT_MAX_PENDING: int = 64  # queued + running jobs before login requests are shed
+    BCRYPT_RETRY_AFTER: int = 1  # seconds, sent in Retry-After when shedding
+    BCRYPT_BATCH_SLOTS: int = 2  # workers bulk provisioning may hold at once, across all requests
+
+    # Authenticated principal cache used by get_current_user
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 60  # seconds
+    TOKEN_CACHE_SIZE: int = 10000  # decoded tokens keyed by digest; 0 disables
+    # Embed org_id/role in the JWT and trust them instead of looking the user up.
+    # Claims then stay as issued until the token expires, even across a rename.
+    AUTH_CLAIMS_ONLY: bool = False
+
+    # Org metadata / tenant collection resolver (app/db/tenants.py)
+    TENANT_CACHE_SIZE: int = 10000
+    TENANT_CACHE_TTL: int = 30  # seconds; also the grace period the tenant migration waits out
+
+    # Background jobs (app/services/job_service.py), worked in-process from the lifespan hook
+    JOB_WORKERS: int = 2  # also the cap on concurrently running jobs per instance
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_LEASE_SECONDS: int = 300
+    JOB_POLL_INTERVAL: float = 5.0
+
+    # POST /organizations/bulk: rows validated, hashed and written per chunk
+    BULK_CHUNK_SIZE: int = 200
+    # NDJSON request bodies (bulk, /tenant/import): a longer line fails on its own, unbuffered
+    NDJSON_MAX_LINE_BYTES: int = 1024 * 1024
+
+    # Tenant data API (app/routers/tenant_data.py)
+    TENANT_PAGE_MAX: int = 500
+    TENANT_EXPORT_BATCH_SIZE: int = 500  # cursor batch size, bounds memory per export
+    TENANT_IMPORT_CHUNK_SIZE: int = 500  # documents per bulk_write
+
+    # In-process rate limiting (app/core/ratelimit.py); a rate or limit of 0 disables that check.
+    # Per client IP on the unauthenticated, bcrypt-heavy routes (login, org creation)
+    IP_RATE_LIMIT: float = 1.0  # requests/s
+    IP_RATE_BURST: int = 10
+    # Per tenant on authenticated organization and tenant data routes
+    TENANT_RATE_LIMIT: float = 50.0  # requests/s
+    TENANT_RATE_BURST: int = 100
+    TENANT_MAX_IN_FLIGHT: int = 20  # concurrent requests (and so DB operations) per tenant
+    RATE_LIMIT_MAX_KEYS: int = 100000  # buckets kept per limiter, least recently used evicted first
+    # Key IP limits on the first X-Forwarded-For hop; only enable behind a proxy that sets it (e.g. Vercel)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,44 @@
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Tuple
+from app.core.config import settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line: Optional[int] = None) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into (line_number, line) pairs without buffering the whole body.
+    Each chunk is scanned once. A line longer than `max_line` bytes is yielded as
+    (line_number, None), and its bytes are dropped as they arrive rather than held.
+    """
+    if max_line is None:
+        max_line = settings.NDJSON_MAX_LINE_BYTES
+    buffer = bytearray()
+    too_long = False
+    line_no = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if not too_long:
+                buffer += chunk[start:] if end == -1 else chunk[start:end]
+                too_long = len(buffer) > max_line
+                if too_long:
+                    buffer.clear()
+            if end == -1:
+                break
+            line_no += 1
+            if too_long:
+                yield line_no, None
+            elif buffer.strip():
+                yield line_no, bytes(buffer)
+            buffer.clear()
+            too_long = False
+            start = end + 1
+    if too_long:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, bytes(buffer)
+
+def dumps_line(obj: Any) -> bytes:
+    # default=str covers ObjectId and datetime
+    return json.dumps(obj, default=str).encode("utf-8") + b"\n"
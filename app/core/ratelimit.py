@@ -0,0 +1,85 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable
+from app.core.metrics import registry
+
+RATE_LIMITED = registry.counter("rate_limited_total", "Requests rejected with 429", ["limiter"])
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key: `rate` tokens/s refill up to `burst`. Buckets are
+    kept in an LRU of at most `maxsize` keys, so memory stays bounded however
+    many clients show up; an evicted key simply starts again with a full bucket.
+    O(1) per check. Like TTLCache, it's meant to be used from the event loop only.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, maxsize: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.evictions = 0
+        # key -> [tokens, last refill time]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for `key`. Returns 0 if allowed, else seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        RATE_LIMITED.inc(limiter=self.name)
+        return (1 - bucket[0]) / self.rate
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "maxsize": self.maxsize, "evictions": self.evictions}
+
+class ConcurrencyLimiter:
+    """
+    Caps in-flight work per key. Only keys with work in flight are stored, so
+    memory is bounded by the number of concurrent requests.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._in_flight: Dict[Hashable, int] = {}
+
+    def try_acquire(self, key: Hashable) -> bool:
+        if self.limit <= 0:
+            return True
+        current = self._in_flight.get(key, 0)
+        if current >= self.limit:
+            RATE_LIMITED.inc(limiter=self.name)
+            return False
+        self._in_flight[key] = current + 1
+        return True
+
+    def release(self, key: Hashable):
+        if self.limit <= 0:
+            return
+        current = self._in_flight.get(key, 0) - 1
+        if current > 0:
+            self._in_flight[key] = current
+        else:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"keys": len(self._in_flight), "in_flight": sum(self._in_flight.values())}
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    # Retry-After takes whole seconds; round up so a client that honours it succeeds
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
@@ -0,0 +1,34 @@
+import json
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.metrics import timed_phase
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+def json_dumps(content) -> bytes:
+    """Compact JSON bytes, via orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that encodes with orjson when available and reports encoding time as the `ser` Server-Timing phase."""
+
+    def render(self, content) -> bytes:
+        with timed_phase("ser"):
+            return json_dumps(content)
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request body as it goes
+    (e.g. NDJSON in, NDJSON out). Starlette's version listens for disconnects on
+    `receive` while streaming, which would steal the request body messages; here
+    the iterator owns `receive`, and request.stream() raises on disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
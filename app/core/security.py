@@ -1,11 +1,18 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+from fastapi import HTTPException, status
 from jose import jwt
 from app.core.config import settings
+from app.core.metrics import record_phase, registry
 import bcrypt
 
 ALGORITHM = "HS256"
 
+BCRYPT_LATENCY = registry.histogram("bcrypt_duration_seconds", "bcrypt call latency, including pool queueing", ["op"])
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -20,9 +27,106 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     # Convert strings to bytes for bcrypt
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     # Bcrypt strictly handles max 72 bytes internally
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(pwd_bytes, salt)
     return hashed.decode('utf-8')
+
+def needs_rehash(hashed_password: str) -> bool:
+    # Hashes look like "$2b$12$<salt+digest>"; the second field is the cost factor
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a worker pool so a burst of logins can't stall the event loop.
+    Admission is bounded: once max_pending jobs are queued or running, new
+    requests are rejected with 503 + Retry-After instead of piling up.
+    Batch work (shed=False) goes through its own `batch_slots` instead: it waits
+    rather than being shed, doesn't count against max_pending, and never holds
+    more than `batch_slots` workers, so bulk provisioning can't lock logins out.
+    """
+
+    def __init__(self, kind: str, size: int, max_pending: int, batch_slots: int):
+        self.kind = kind
+        self.size = size
+        self.max_pending = max_pending
+        self.batch_slots = batch_slots
+        self._batch_gate = asyncio.Semaphore(batch_slots)
+        self.pending = 0
+        self.batch_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn, *args, shed: bool = True):
+        if not shed:
+            async with self._batch_gate:
+                self.batch_pending += 1
+                try:
+                    return await self._submit(fn, *args)
+                finally:
+                    self.batch_pending -= 1
+        if self.pending - self.batch_pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy, retry shortly",
+                headers={"Retry-After": str(settings.BCRYPT_RETRY_AFTER)},
+            )
+        return await self._submit(fn, *args)
+
+    async def _submit(self, fn, *args):
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            elapsed = time.perf_counter() - start
+            BCRYPT_LATENCY.observe(elapsed, op=fn.__name__)
+            record_phase("bcrypt", elapsed)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "size": self.size,
+            "pending": self.pending,
+            "batch_pending": self.batch_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher(
+    kind=settings.BCRYPT_POOL_KIND,
+    size=settings.BCRYPT_POOL_SIZE,
+    max_pending=settings.BCRYPT_MAX_PENDING,
+    batch_slots=settings.BCRYPT_BATCH_SLOTS,
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str, shed: bool = True) -> str:
+    return await hasher.run(get_password_hash, password, settings.BCRYPT_ROUNDS, shed=shed)
@@ -0,0 +1,170 @@
+"""
+Copying a tenant's collection somewhere else while the app keeps running:
+batched, checkpointed copies and reconciliation, and CollectionMove, the
+resumable freeze/copy/verify/cleanup sequence that app.db.move_tenant and
+app.db.migrate_tenants both run.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Tuple
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("freeze", "copy", "verify", "cleanup")
+
+async def copy_in_batches(source, target, after: Any, batch_size: int,
+                          checkpoint: Callable[[Any], Awaitable[None]]) -> Any:
+    """
+    Copy documents with _id > `after` from `source` to `target` in _id order,
+    calling `checkpoint(last_id)` after each batch so an interrupted copy can
+    resume from there. Re-copying a batch is harmless: duplicate _ids are skipped.
+    Returns the last _id copied (or `after` if there was nothing new).
+    """
+    from pymongo.errors import BulkWriteError
+
+    while True:
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        batch = await source.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            return after
+        try:
+            await target.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+        after = batch[-1]["_id"]
+        await checkpoint(after)
+        logger.info("Copied %d documents up to %s", len(batch), after)
+
+async def _ids_missing_from(collection, ids: list) -> list:
+    present = {doc["_id"] async for doc in collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+    return [doc_id for doc_id in ids if doc_id not in present]
+
+async def reconcile(source, target, batch_size: int) -> Tuple[int, int]:
+    """
+    Make target's documents match source's by _id: copy what target lacks and
+    delete what source no longer has. Unlike copy_in_batches this doesn't assume
+    new documents sort after the last copied _id (ObjectIds from different app
+    processes don't), so it is the final check before switching collections.
+    Only meant for a source that no longer takes writes. Returns (copied, deleted).
+    """
+    from pymongo.errors import BulkWriteError
+
+    copied = deleted = 0
+
+    async def id_batches(collection):
+        batch = []
+        async for doc in collection.find({}, {"_id": 1}, batch_size=batch_size):
+            batch.append(doc["_id"])
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async for ids in id_batches(source):
+        missing = await _ids_missing_from(target, ids)
+        if missing:
+            docs = await source.find({"_id": {"$in": missing}}).to_list(length=None)
+            try:
+                await target.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+            copied += len(docs)
+    async for ids in id_batches(target):
+        extra = await _ids_missing_from(source, ids)
+        if extra:
+            result = await target.delete_many({"_id": {"$in": extra}})
+            deleted += result.deleted_count
+    if copied or deleted:
+        logger.info("Reconciled: copied %d missing and deleted %d stale documents", copied, deleted)
+    return copied, deleted
+
+class CollectionMove:
+    """
+    One tenant collection being copied from `source` to `target`. Progress lives on the
+    organization document under `marker` ({"source", "target", "phase", "last_id"}), so an
+    interrupted run resumes where it stopped. Reads keep working throughout; writes to the
+    tenant's data get 503 + Retry-After from the freeze until the switch
+    (see app.db.tenants.writes_frozen), so nothing written meanwhile is lost:
+
+    1. freeze  - marker set; wait `grace` seconds (longer than TENANT_CACHE_TTL) until
+       every instance has seen it and stopped writing
+    2. copy    - documents are copied in _id order, `batch_size` at a time
+    3. verify  - full _id comparison of source and target, fixing up any difference; then
+       `switch()` runs and the org fields it returns are set in the update that unfreezes writes
+    4. cleanup - after another `grace` seconds, when no instance still reads the source,
+       it is dropped and the marker removed
+
+    A write request that started before the freeze and is still running after `grace`
+    (e.g. a very large /tenant/import) can still reach the source; pick `grace` accordingly.
+    """
+
+    def __init__(self, org: dict, marker: str, source, target, switch: Callable[[], Awaitable[dict]]):
+        self.org = org
+        self.marker = marker
+        self.source = source
+        self.target = target
+        self.switch = switch
+
+    @staticmethod
+    async def begin(org: dict, marker: str, source: str, target: str):
+        """Record a new move under `marker`, in phase freeze."""
+        org[marker] = {"source": source, "target": target, "phase": "freeze", "last_id": None}
+        await db.get_db()["organizations"].update_one(
+            {"_id": org["_id"], marker: {"$exists": False}}, {"$set": {marker: org[marker]}}
+        )
+
+    @property
+    def state(self) -> dict:
+        return self.org[self.marker]
+
+    async def set_phase(self, phase: str, extra: dict = None):
+        self.state["phase"] = phase
+        update = {f"{self.marker}.phase": phase}
+        update.update(extra or {})
+        await db.get_db()["organizations"].update_one({"_id": self.org["_id"]}, {"$set": update})
+
+    async def _checkpoint(self, last_id):
+        self.state["last_id"] = last_id
+        await db.get_db()["organizations"].update_one(
+            {"_id": self.org["_id"]}, {"$set": {f"{self.marker}.last_id": last_id}}
+        )
+
+    async def _finish(self):
+        await self.source.database.drop_collection(self.source.name)
+        await db.get_db()["organizations"].update_one({"_id": self.org["_id"]}, {"$unset": {self.marker: ""}})
+        logger.info("%s: %s done, %s -> %s", self.org["name"], self.marker, self.state["source"], self.state["target"])
+
+async def run_moves(moves: List[CollectionMove], batch_size: int, grace: float):
+    """
+    Take `moves` through their remaining phases together, so however many tenants
+    there are, `grace` is waited out once for the freeze and once before cleanup.
+    """
+    for move in moves:
+        if move.state["phase"] not in PHASES:
+            raise ValueError(f"{move.org['name']} has a {move.marker} in unknown phase {move.state['phase']!r}")
+
+    freezing = [move for move in moves if move.state["phase"] == "freeze"]
+    if freezing:
+        logger.info("Waiting %.0fs for every instance to pause writes to %d tenant(s)", grace, len(freezing))
+        await asyncio.sleep(grace)
+        for move in freezing:
+            await move.set_phase("copy")
+
+    for move in moves:
+        if move.state["phase"] == "copy":
+            await copy_in_batches(move.source, move.target, move.state["last_id"], batch_size, move._checkpoint)
+            await move.set_phase("verify")
+        if move.state["phase"] == "verify":
+            await reconcile(move.source, move.target, batch_size)
+            # Switch and unfreeze in one update
+            await move.set_phase("cleanup", await move.switch())
+
+    if moves:
+        logger.info("Waiting %.0fs for cached resolvers to expire", grace)
+        await asyncio.sleep(grace)
+        for move in moves:
+            await move._finish()
@@ -1,27 +1,76 @@
-import certifi
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import TYPE_CHECKING, Dict, List, Optional
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+DATABASE_NAME = "wedding_app"
+# Cluster holding the master collections (users, organizations, jobs); always MONGO_URL
+DEFAULT_CLUSTER = "default_cluster"
+
 class Database:
-    client: AsyncIOMotorClient = None
+    # One client per cluster per process. They are created on first use, so cold starts
+    # don't pay for importing motor/pymongo until a route actually needs the database.
+    client: Optional["AsyncIOMotorClient"] = None
+
+    def __init__(self):
+        # Additional tenant clusters from MONGO_CLUSTERS, keyed by cluster name
+        self.cluster_clients: Dict[str, "AsyncIOMotorClient"] = {}
+
+    def _create_client(self, url: str) -> "AsyncIOMotorClient":
+        import certifi
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from app.db.monitoring import CommandTimer, PoolTimer
 
-    def connect(self):
-        # Set timeout to 5s so Vercel doesn't kill the function (default 10s limit)
         # Use certifi for robust SSL on serverless environments
-        self.client = AsyncIOMotorClient(
-            settings.MONGO_URL, 
-            serverSelectionTimeoutMS=5000,
-            tlsCAFile=certifi.where()
+        return AsyncIOMotorClient(
+            url, 
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+            tlsCAFile=certifi.where(),
+            event_listeners=[CommandTimer(), PoolTimer()]
         )
 
+    def connect(self):
+        if self.client is None:
+            self.client = self._create_client(settings.MONGO_URL)
+
+    async def warm_up(self):
+        await self.get_db().command("ping")
+
     def close(self):
+        # In serverless mode the clients outlive the lifespan so warm invocations reuse their pools
+        if settings.SERVERLESS:
+            return
         if self.client:
             self.client.close()
+            self.client = None
+        for client in self.cluster_clients.values():
+            client.close()
+        self.cluster_clients = {}
+
+    def cluster_names(self) -> List[str]:
+        return [DEFAULT_CLUSTER] + [name for name in settings.MONGO_CLUSTERS if name != DEFAULT_CLUSTER]
+
+    def get_cluster_db(self, cluster: Optional[str] = None):
+        if cluster is None or cluster == DEFAULT_CLUSTER:
+            return self.get_db()
+        client = self.cluster_clients.get(cluster)
+        if client is None:
+            if cluster not in settings.MONGO_CLUSTERS:
+                raise ValueError(f"Unknown cluster: {cluster}")
+            client = self.cluster_clients[cluster] = self._create_client(settings.MONGO_CLUSTERS[cluster])
+        return client[DATABASE_NAME]
 
     def get_db(self):
-        return self.client["wedding_app"]
+        self.connect()
+        return self.client[DATABASE_NAME]
 
-    def get_dynamic_collection(self, collection_name: str):
-        return self.client["wedding_app"][collection_name]
+    def get_dynamic_collection(self, collection_name: str, cluster: Optional[str] = None):
+        return self.get_cluster_db(cluster)[collection_name]
 
 db = Database()
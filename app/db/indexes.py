@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Set
+
+logger = logging.getLogger(__name__)
+
+# Append-only: each entry is applied once and recorded in `schema_migrations`.
+# To change an index, add a new version that drops/recreates it; never edit an old one.
+INDEX_MIGRATIONS = [
+    (1, "users", [("email", 1)], {"name": "users_email_unique", "unique": True}),
+    (2, "users", [("org_name", 1)], {"name": "users_org_name"}),
+    (3, "organizations", [("name", 1)], {"name": "organizations_name_unique", "unique": True}),
+    # Older org documents have no email; only enforce uniqueness where it is set
+    (4, "organizations", [("email", 1)], {
+        "name": "organizations_email_unique",
+        "unique": True,
+        "partialFilterExpression": {"email": {"$type": "string"}},
+    }),
+    (5, "users", [("org_id", 1)], {"name": "users_org_id"}),
+    (6, "jobs", [("status", 1), ("available_at", 1)], {"name": "jobs_status_available_at"}),
+    (7, "jobs", [("owner", 1), ("kind", 1)], {"name": "jobs_owner_kind"}),
+    (8, "organizations", [("connection_uri", 1)], {"name": "organizations_connection_uri"}),
+]
+
+# Names of unique indexes known to exist in this process. Until ensure_indexes has
+# confirmed one, writers fall back to checking for duplicates themselves (see is_enforced).
+_enforced_unique: Set[str] = set()
+_loaded = False
+
+def is_enforced(index_name: str) -> bool:
+    return index_name in _enforced_unique
+
+async def load_enforced(database):
+    """
+    Learn which unique indexes exist from `schema_migrations`, once per process,
+    without building anything. For processes that skip ensure_indexes (SERVERLESS).
+    """
+    global _loaded
+    if _loaded:
+        return
+    applied = {doc["_id"] async for doc in database["schema_migrations"].find({}, {"_id": 1})}
+    for version, _, _, options in INDEX_MIGRATIONS:
+        if version in applied and options.get("unique"):
+            _enforced_unique.add(options["name"])
+    _loaded = True
+
+async def find_duplicates(collection, keys, partial_filter=None, limit: int = 20) -> List[dict]:
+    """Groups of documents sharing a value of `keys`, i.e. what would stop a unique index build."""
+    group_key = f"${keys[0][0]}" if len(keys) == 1 else {field: f"${field}" for field, _ in keys}
+    pipeline = [
+        {"$match": partial_filter or {}},
+        {"$group": {"_id": group_key, "count": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ]
+    return [row async for row in collection.aggregate(pipeline)]
+
+async def _apply(database, version: int, collection: str, keys, options: dict) -> bool:
+    if options.get("unique"):
+        # Building the index would fail anyway; report what has to be resolved first
+        duplicates = await find_duplicates(database[collection], keys, options.get("partialFilterExpression"))
+        if duplicates:
+            logger.error(
+                "Index migration %s (%s.%s) not applied: duplicate values %s. "
+                "Rename or remove the duplicates, then restart or run `python -m app.db.indexes`.",
+                version, collection, options["name"],
+                ", ".join(f"{row['_id']!r} x{row['count']} (ids {row['ids']})" for row in duplicates),
+            )
+            return False
+    # create_index is a no-op if an identical index already exists
+    await database[collection].create_index(keys, **options)
+    await database["schema_migrations"].update_one(
+        {"_id": version},
+        {"$setOnInsert": {"collection": collection, "index": options["name"], "applied_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    logger.info("Applied index migration %s: %s.%s", version, collection, options["name"])
+    return True
+
+async def ensure_indexes(database) -> list:
+    """
+    Create any index migrations not yet recorded. Safe to run concurrently and on every startup.
+    Each migration is applied on its own, so one that can't be built doesn't hold back the rest.
+    Returns the versions that are still pending.
+    """
+    global _loaded
+    applied = {doc["_id"] async for doc in database["schema_migrations"].find({}, {"_id": 1})}
+    pending = []
+    for version, collection, keys, options in INDEX_MIGRATIONS:
+        if version not in applied:
+            try:
+                ok = await _apply(database, version, collection, keys, options)
+            except Exception:
+                logger.exception("Index migration %s (%s.%s) failed", version, collection, options["name"])
+                ok = False
+            if not ok:
+                pending.append(version)
+                continue
+        if options.get("unique"):
+            _enforced_unique.add(options["name"])
+    _loaded = True
+    return pending
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    from app.db.database import db
+
+    async def run():
+        db.connect()
+        try:
+            pending = await ensure_indexes(db.get_db())
+        finally:
+            db.close()
+        if pending:
+            raise SystemExit(f"Index migrations still pending: {pending}")
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Move tenants from name-based `org_<name>` collections to immutable `tenant_<uuid>` ones.
+
+    python -m app.db.migrate_tenants [--batch-size 500] [--grace 35] [--tenants-per-batch 20] [--dry-run]
+
+Online and resumable: each tenant goes through the freeze/copy/verify/cleanup phases of
+app.db.batch_copy.CollectionMove with progress under `migration`. The switch gives the
+tenant's users `org_id` in place of `org_name` and points `collection_name` at the new
+collection.
+
+Afterwards every tenant collection loses the `{"info": "tenant_initialized"}` document
+tenants used to be created with (see remove_placeholders).
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+from app.core.config import settings
+from app.db.batch_copy import CollectionMove, run_moves
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+# Inserted as the first document of every tenant collection before they were made with create_collection
+LEGACY_PLACEHOLDER = {"info": "tenant_initialized"}
+
+async def _migration(org: dict) -> CollectionMove:
+    if "migration" not in org:
+        await CollectionMove.begin(org, "migration", org["collection_name"], f"tenant_{uuid.uuid4().hex}")
+    state = org["migration"]
+    cluster = org.get("connection_uri")
+
+    async def switch():
+        # Re-read the name in case the org was renamed while copying
+        current = await db.get_db()["organizations"].find_one({"_id": org["_id"]}, {"name": 1})
+        await db.get_db()["users"].update_many(
+            {"org_name": current["name"]},
+            {"$set": {"org_id": org["_id"]}, "$unset": {"org_name": ""}},
+        )
+        return {"collection_name": state["target"]}
+
+    return CollectionMove(
+        org, "migration",
+        db.get_dynamic_collection(state["source"], cluster), db.get_dynamic_collection(state["target"], cluster),
+        switch,
+    )
+
+async def migrate_org(org: dict, batch_size: int, grace: float):
+    await run_moves([await _migration(org)], batch_size, grace)
+
+async def migrate_all(batch_size: int, grace: float, dry_run: bool = False, tenants_per_batch: int = 20) -> int:
+    """
+    Migrate tenants `tenants_per_batch` at a time: a batch is frozen together and waits
+    out `grace` once before copying and once before cleanup, instead of per tenant.
+    Each tenant's writes stay paused while the rest of its batch is copied.
+    """
+    # Tenants still on org_<name>, plus any run interrupted after the flip
+    query = {"$or": [{"collection_name": {"$regex": "^org_"}}, {"migration": {"$exists": True}}]}
+    organizations = db.get_db()["organizations"]
+    migrated = 0
+    if dry_run:
+        async for org in organizations.find(query):
+            logger.info("Would migrate %s (%s)", org["name"], org["collection_name"])
+            migrated += 1
+        return migrated
+    while True:
+        # Queried afresh for every batch: a cursor held open across the grace waits
+        # would be killed by the server's idle cursor timeout
+        batch = await organizations.find(query).limit(tenants_per_batch).to_list(length=tenants_per_batch)
+        if not batch:
+            return migrated
+        await run_moves([await _migration(org) for org in batch], batch_size, grace)
+        migrated += len(batch)
+        logger.info("Migrated %d tenant(s) so far", migrated)
+
+async def _placeholder_id(collection):
+    """_id of the legacy placeholder if it is still the first document, exactly as inserted."""
+    first = await collection.find({}).sort("_id", 1).limit(1).to_list(length=1)
+    if first and {k: v for k, v in first[0].items() if k != "_id"} == LEGACY_PLACEHOLDER:
+        return first[0]["_id"]
+    return None
+
+async def remove_placeholders(dry_run: bool = False) -> int:
+    # A tenant's own document that merely looks similar is left alone
+    removed = 0
+    projection = {"name": 1, "collection_name": 1, "connection_uri": 1}
+    async for org in db.get_db()["organizations"].find({}, projection):
+        collection = db.get_dynamic_collection(org["collection_name"], org.get("connection_uri"))
+        placeholder_id = await _placeholder_id(collection)
+        if placeholder_id is None:
+            continue
+        if dry_run:
+            logger.info("Would remove the placeholder from %s (%s)", org["name"], org["collection_name"])
+            removed += 1
+        else:
+            result = await collection.delete_one({"_id": placeholder_id, **LEGACY_PLACEHOLDER})
+            removed += result.deleted_count
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate org_<name> collections to tenant_<uuid>")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--grace", type=float, default=settings.TENANT_CACHE_TTL + 5)
+    parser.add_argument("--tenants-per-batch", type=int, default=20,
+                        help="tenants frozen, copied and cleaned up together (one pair of grace waits each)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    async def run():
+        db.connect()
+        try:
+            count = await migrate_all(args.batch_size, args.grace, args.dry_run, args.tenants_per_batch)
+            logger.info("Done: %d tenant(s)", count)
+            removed = await remove_placeholders(args.dry_run)
+            logger.info("Removed the legacy placeholder from %d tenant(s)", removed)
+        finally:
+            db.close()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from pymongo import monitoring
+from app.core.metrics import record_phase, registry
+
+COMMAND_LATENCY = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "collection", "outcome"]
+)
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool"
+)
+POOL_CHECKOUT_FAILURES = registry.counter(
+    "mongo_pool_checkout_failures_total", "Failed connection checkouts", ["reason"]
+)
+
+# Tenant collections are one per org; fold them into a single label value to bound cardinality
+def _collection_label(name) -> str:
+    if isinstance(name, str) and (name.startswith("tenant_") or name.startswith("org_")):
+        return "<tenant>"
+    return name if isinstance(name, str) else ""
+
+class CommandTimer(monitoring.CommandListener):
+    """Records command latency per command/collection and adds it to the request's `db` phase."""
+
+    def __init__(self):
+        # request_id -> collection name; started/succeeded events are paired by request_id
+        self._collections = {}
+
+    def started(self, event):
+        self._collections[event.request_id] = _collection_label(event.command.get(event.command_name))
+
+    def _finish(self, event, outcome: str):
+        seconds = event.duration_micros / 1e6
+        COMMAND_LATENCY.observe(
+            seconds,
+            command=event.command_name,
+            collection=self._collections.pop(event.request_id, ""),
+            outcome=outcome,
+        )
+        record_phase("db", seconds)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+class PoolTimer(monitoring.ConnectionPoolListener):
+    """Records pool checkout wait; the duration field needs pymongo >= 4.7."""
+
+    def connection_checked_out(self, event):
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            POOL_CHECKOUT_WAIT.observe(duration)
+
+    def connection_check_out_failed(self, event):
+        POOL_CHECKOUT_FAILURES.inc(reason=event.reason)
+
+    # The remaining pool events aren't needed
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_checked_in(self, event): pass
@@ -0,0 +1,67 @@
+"""
+Live-migrate one tenant's collection to another cluster.
+
+    python -m app.db.move_tenant --org acme --to cluster_b [--batch-size 500] [--grace 35]
+
+Clusters are the names in MONGO_CLUSTERS (plus "default_cluster" for MONGO_URL).
+The collection keeps its name; the move runs the freeze/copy/verify/cleanup phases of
+app.db.batch_copy.CollectionMove with progress under `cluster_move`, and the switch
+points `connection_uri` at the target cluster.
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.db.batch_copy import CollectionMove, run_moves
+from app.db.database import DEFAULT_CLUSTER, db
+
+logger = logging.getLogger(__name__)
+
+async def move_tenant(org: dict, target: str, batch_size: int, grace: float):
+    if target not in db.cluster_names():
+        raise ValueError(f"Unknown cluster: {target}")
+    if "cluster_move" not in org:
+        source = org.get("connection_uri") or DEFAULT_CLUSTER
+        if source == target:
+            logger.info("%s is already on %s", org["name"], target)
+            return
+        await CollectionMove.begin(org, "cluster_move", source, target)
+    state = org["cluster_move"]
+    if state["target"] != target:
+        raise ValueError(f"{org['name']} has an unfinished move to {state['target']}; resume that first")
+
+    async def switch():
+        return {"connection_uri": state["target"]}
+
+    name = org["collection_name"]
+    move = CollectionMove(
+        org, "cluster_move",
+        db.get_dynamic_collection(name, state["source"]), db.get_dynamic_collection(name, state["target"]),
+        switch,
+    )
+    await run_moves([move], batch_size, grace)
+
+def main():
+    parser = argparse.ArgumentParser(description="Move a tenant's collection to another cluster")
+    parser.add_argument("--org", required=True, help="organization name")
+    parser.add_argument("--to", required=True, help="target cluster name")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--grace", type=float, default=settings.TENANT_CACHE_TTL + 5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    async def run():
+        db.connect()
+        try:
+            org = await db.get_db()["organizations"].find_one({"name": args.org})
+            if org is None:
+                raise SystemExit(f"No organization named {args.org!r}")
+            await move_tenant(org, args.to, args.batch_size, args.grace)
+        finally:
+            db.close()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import hashlib
+import time
+from typing import Callable, Dict, List
+from app.core.config import settings
+from app.db.database import db
+
+class PlacementPolicy:
+    """Chooses the cluster a new tenant's collection is created on."""
+
+    async def choose(self, org_name: str) -> str:
+        raise NotImplementedError
+
+class PinnedPlacement(PlacementPolicy):
+    """Every new tenant goes to one configured cluster (TENANT_PLACEMENT_PIN)."""
+
+    def __init__(self, cluster: str):
+        if cluster not in db.cluster_names():
+            raise ValueError(f"TENANT_PLACEMENT_PIN {cluster!r} is not a configured cluster: {db.cluster_names()}")
+        self.cluster = cluster
+
+    async def choose(self, org_name: str) -> str:
+        return self.cluster
+
+class HashPlacement(PlacementPolicy):
+    """
+    Rendezvous hashing on the org name: deterministic without any lookups, and
+    adding a cluster only moves the share of new placements that now hash to it.
+    """
+
+    def __init__(self, clusters: Callable[[], List[str]]):
+        self.clusters = clusters
+
+    async def choose(self, org_name: str) -> str:
+        return max(
+            self.clusters(),
+            key=lambda cluster: hashlib.sha256(f"{cluster}:{org_name}".encode("utf-8")).digest(),
+        )
+
+class LeastLoadedPlacement(PlacementPolicy):
+    """
+    Picks the cluster holding the fewest tenants. Counts come from one aggregate
+    over organizations.connection_uri, refreshed every `refresh_seconds` and
+    bumped locally in between, so bulk provisioning doesn't aggregate per row.
+    """
+
+    def __init__(self, clusters: Callable[[], List[str]], refresh_seconds: float = 10.0):
+        self.clusters = clusters
+        self.refresh_seconds = refresh_seconds
+        self._counts: Dict[str, int] = {}
+        self._refreshed_at = 0.0
+
+    async def _refresh(self):
+        counts = {cluster: 0 for cluster in self.clusters()}
+        async for row in db.get_db()["organizations"].aggregate([
+            {"$group": {"_id": "$connection_uri", "count": {"$sum": 1}}},
+        ]):
+            if row["_id"] in counts:
+                counts[row["_id"]] = row["count"]
+        self._counts = counts
+        self._refreshed_at = time.monotonic()
+
+    async def choose(self, org_name: str) -> str:
+        clusters = self.clusters()
+        if len(clusters) == 1:
+            return clusters[0]
+        if time.monotonic() - self._refreshed_at > self.refresh_seconds:
+            await self._refresh()
+        cluster = min(self._counts, key=self._counts.get)
+        self._counts[cluster] += 1
+        return cluster
+
+# Pluggable: register another factory under a name and select it with TENANT_PLACEMENT
+PLACEMENT_POLICIES: Dict[str, Callable[[], PlacementPolicy]] = {
+    "pinned": lambda: PinnedPlacement(settings.TENANT_PLACEMENT_PIN),
+    "hash": lambda: HashPlacement(db.cluster_names),
+    "least_loaded": lambda: LeastLoadedPlacement(db.cluster_names),
+}
+
+_policy: PlacementPolicy = None
+
+def get_placement_policy() -> PlacementPolicy:
+    """The configured policy; raises ValueError for a setting that names nothing usable."""
+    global _policy
+    if _policy is None:
+        factory = PLACEMENT_POLICIES.get(settings.TENANT_PLACEMENT)
+        if factory is None:
+            raise ValueError(
+                f"Unknown TENANT_PLACEMENT {settings.TENANT_PLACEMENT!r}; expected one of {sorted(PLACEMENT_POLICIES)}"
+            )
+        _policy = factory()
+    return _policy
+
+async def place_tenant(org_name: str) -> str:
+    """Cluster for a new tenant, checked so no org is ever saved on a cluster that can't be resolved."""
+    cluster = await get_placement_policy().choose(org_name)
+    if cluster not in db.cluster_names():
+        raise ValueError(f"Placement chose unknown cluster {cluster!r}")
+    return cluster
@@ -0,0 +1,94 @@
+import hashlib
+from typing import Optional, Tuple
+from bson import ObjectId
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import json_dumps
+from app.db.database import db
+
+# Phases of a collection move (app.db.batch_copy.CollectionMove) during which
+# the tenant's data is being copied: writes then would be lost, so they are refused instead
+WRITE_FROZEN_PHASES = {"freeze", "copy", "verify"}
+
+def writes_frozen(org: dict) -> bool:
+    return any(
+        (org.get(marker) or {}).get("phase") in WRITE_FROZEN_PHASES for marker in ("cluster_move", "migration")
+    )
+
+class TenantResolver:
+    """
+    Cached lookup from an organization (by id or name) to its metadata and
+    tenant collection, on whichever cluster the metadata places it. Collection
+    names are immutable `tenant_<uuid>` ids, so the only thing that goes stale
+    is the friendly name, and rename/delete invalidate it explicitly. Returned
+    documents are shared; copy before mutating.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._orgs = TTLCache(maxsize=maxsize, ttl=ttl)  # org _id -> metadata
+        self._names = TTLCache(maxsize=maxsize, ttl=ttl)  # name -> org _id
+        self._views = TTLCache(maxsize=maxsize, ttl=ttl)  # org _id -> (etag, serialized metadata)
+
+    def _remember(self, org: dict) -> dict:
+        self._orgs.set(org["_id"], org)
+        self._names.set(org["name"], org["_id"])
+        return org
+
+    async def get_org(self, org_id: ObjectId) -> Optional[dict]:
+        org = self._orgs.get(org_id)
+        if org is None:
+            org = await db.get_db()["organizations"].find_one({"_id": org_id})
+            if org is None:
+                return None
+            self._remember(org)
+        return org
+
+    async def get_org_by_name(self, name: str) -> Optional[dict]:
+        org_id = self._names.get(name)
+        if org_id is not None:
+            org = await self.get_org(org_id)
+            if org is not None and org["name"] == name:
+                return org
+        org = await db.get_db()["organizations"].find_one({"name": name})
+        return self._remember(org) if org else None
+
+    async def org_for_user(self, user: dict) -> Optional[dict]:
+        # Users created before the tenant-id migration still reference org_name
+        if user.get("org_id") is not None:
+            return await self.get_org(user["org_id"])
+        return await self.get_org_by_name(user["org_name"])
+
+    async def get_org_view(self, org_id: ObjectId) -> Optional[Tuple[str, bytes]]:
+        """The org's metadata as ready-to-send JSON bytes, with an ETag derived from them."""
+        view = self._views.get(org_id)
+        if view is None:
+            org = await self.get_org(org_id)
+            if org is None:
+                return None
+            body = json_dumps({**org, "_id": str(org["_id"])})
+            view = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+            self._views.set(org_id, view)
+        return view
+
+    async def get_collection(self, org_id: ObjectId):
+        org = await self.get_org(org_id)
+        return self.collection_for(org) if org else None
+
+    async def get_collection_by_name(self, name: str):
+        org = await self.get_org_by_name(name)
+        return self.collection_for(org) if org else None
+
+    @staticmethod
+    def collection_for(org: dict):
+        # connection_uri names the cluster the tenant lives on (see app/db/placement.py)
+        return db.get_dynamic_collection(org["collection_name"], org.get("connection_uri"))
+
+    def invalidate(self, org: dict):
+        self._orgs.pop(org["_id"])
+        self._names.pop(org["name"])
+        self._views.pop(org["_id"])
+
+    def stats(self) -> dict:
+        return self._orgs.stats()
+
+tenants = TenantResolver(maxsize=settings.TENANT_CACHE_SIZE, ttl=settings.TENANT_CACHE_TTL)
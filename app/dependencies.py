@@ -1,28 +1,125 @@
-from fastapi import Depends, HTTPException, status
+import hashlib
+import time
+from typing import Optional
+from bson import ObjectId
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import timed_phase
+from app.core.ratelimit import ConcurrencyLimiter, TokenBucketLimiter, retry_after_header
 from app.db.database import db
+from app.db.tenants import tenants, writes_frozen
 from app.core.security import ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login")
 
+# email -> user document. Treat cached documents as read-only.
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+# sha256(token) -> decoded claims, so repeat requests skip signature verification
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+ip_limiter = TokenBucketLimiter("ip", settings.IP_RATE_LIMIT, settings.IP_RATE_BURST, settings.RATE_LIMIT_MAX_KEYS)
+tenant_limiter = TokenBucketLimiter(
+    "tenant", settings.TENANT_RATE_LIMIT, settings.TENANT_RATE_BURST, settings.RATE_LIMIT_MAX_KEYS
+)
+tenant_concurrency = ConcurrencyLimiter("tenant_in_flight", settings.TENANT_MAX_IN_FLIGHT)
+
+def invalidate_principals(org: Optional[dict] = None, email: Optional[str] = None):
+    if email is not None:
+        principal_cache.pop(email)
+    if org is not None:
+        # Match both current users (org_id) and ones not yet migrated off org_name
+        principal_cache.invalidate_where(
+            lambda _, user: user.get("org_id") == org["_id"] or user.get("org_name") == org["name"]
+        )
+
+def _decode_token(token: str) -> dict:
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        # Never cache a token past its own expiry
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            token_cache.set(digest, payload, ttl=min(settings.PRINCIPAL_CACHE_TTL, remaining))
+    elif payload.get("exp", 0) <= time.time():
+        token_cache.pop(digest)
+        raise JWTError("Signature has expired.")
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    with timed_phase("auth"):
+        return await _authenticate(token)
+
+async def _authenticate(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = await db.get_db()["users"].find_one({"email": email})
+
+    if settings.AUTH_CLAIMS_ONLY and "org_id" in payload:
+        return {"email": email, "org_id": ObjectId(payload["org_id"]), "role": payload.get("role")}
+
+    user = principal_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = await db.get_db()["users"].find_one({"email": email})
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(email, user)
         
     return user
+
+async def get_tenant_collection(request: Request, current_user: dict = Depends(get_current_user)):
+    org = await tenants.org_for_user(current_user)
+    if org is None:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    if request.method != "GET" and writes_frozen(org):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tenant data is being moved; writes are paused, retry later",
+            headers={"Retry-After": str(settings.TENANT_CACHE_TTL)},
+        )
+    return tenants.collection_for(org)
+
+def _client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests, retry shortly",
+        headers=retry_after_header(retry_after),
+    )
+
+async def limit_by_ip(request: Request):
+    retry_after = ip_limiter.acquire(_client_ip(request))
+    if retry_after:
+        raise _too_many_requests(retry_after)
+
+async def limit_by_tenant(current_user: dict = Depends(get_current_user)):
+    # Users not yet migrated off org_name are keyed by it instead
+    key = current_user.get("org_id") or current_user.get("org_name") or current_user.get("email")
+    retry_after = tenant_limiter.acquire(key)
+    if retry_after:
+        raise _too_many_requests(retry_after)
+    if not tenant_concurrency.try_acquire(key):
+        raise _too_many_requests(1)
+    # The slot is held until the response (including a streamed one) has been sent
+    try:
+        yield
+    finally:
+        tenant_concurrency.release(key)
@@ -1,23 +1,65 @@
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.responses import TimedJSONResponse
 from app.db.database import db
-from app.routers import auth, organization
+from app.db.indexes import ensure_indexes
+from app.db.placement import get_placement_policy
+from app.core.security import hasher
+from app.db.tenants import tenants
+from app.dependencies import ip_limiter, principal_cache, tenant_concurrency, tenant_limiter, token_cache
+from app.middleware import MetricsMiddleware
+from app.services.job_service import job_queue
+from app.services.org_service import OrganizationService
+from app.routers import auth, jobs, organization, tenant_data
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    db.connect()
+    # A TENANT_PLACEMENT/TENANT_PLACEMENT_PIN naming nothing fails here, not on the first signup
+    get_placement_policy()
+    job_queue.register("delete_organization", OrganizationService.deletion_steps)
+    if settings.SERVERLESS:
+        # Every cold start runs this, so keep Mongo off the startup path: the client is
+        # created on first use, indexes are built at deploy time (`python -m app.db.indexes`)
+        # and only read back by the first write that needs them (load_enforced), and job
+        # workers start with the first job this instance enqueues. Queued jobs from
+        # instances that were recycled are picked up by the next one that enqueues.
+        job_queue.autostart = True
+    else:
+        db.connect()
+        try:
+            pending = await ensure_indexes(db.get_db())
+            if pending:
+                logger.warning("Index migrations %s pending; create/rename pre-check uniqueness until they apply", pending)
+        except Exception:
+            # Don't take the API down if Mongo is briefly unreachable; the next startup retries.
+            # Until then no unique index counts as confirmed, so writers keep their pre-checks.
+            logger.exception("Index bootstrap failed")
+        job_queue.start()
+    if settings.MONGO_WARMUP_PING:
+        try:
+            await db.warm_up()
+        except Exception:
+            logger.exception("Mongo warm-up ping failed")
     yield
     # Shutdown
+    await job_queue.stop()
     db.close()
+    hasher.shutdown()
 
 app = FastAPI(
     title="Organization Management Service",
     description="Backend Assignment for Multi-tenant Organization Management",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
 @app.exception_handler(Exception)
@@ -36,13 +78,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router, tags=["Auth"])
 app.include_router(organization.router, tags=["Organizations"])
+app.include_router(jobs.router, tags=["Jobs"])
+app.include_router(tenant_data.router, tags=["Tenant Data"])
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "db": "connected" if db.client else "disconnected"}
+    return {
+        "status": "ok",
+        "db": "connected" if db.client else "disconnected",
+        "caches": {"principals": principal_cache.stats(), "tokens": token_cache.stats()},
+    }
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Organization Management Service API"}
+
+CACHE_STATS = registry.gauge("cache_stat", "In-process cache counters and sizes", ["cache", "stat"])
+BCRYPT_POOL = registry.gauge("bcrypt_pool", "bcrypt worker pool state", ["stat"])
+RATE_LIMITER = registry.gauge("rate_limiter", "Rate limiter state", ["limiter", "stat"])
+
+def _collect_component_stats():
+    for name, cache_stats in (
+        ("principals", principal_cache.stats()),
+        ("tokens", token_cache.stats()),
+        ("tenants", tenants.stats()),
+    ):
+        for stat, value in cache_stats.items():
+            CACHE_STATS.set(value, cache=name, stat=stat)
+    for stat in ("size", "pending", "batch_pending", "completed", "rejected"):
+        BCRYPT_POOL.set(hasher.stats()[stat], stat=stat)
+    for limiter in (ip_limiter, tenant_limiter, tenant_concurrency):
+        for stat, value in limiter.stats().items():
+            RATE_LIMITER.set(value, limiter=limiter.name, stat=stat)
+
+registry.register_collector(_collect_component_stats)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    try:
+        # Refreshes the queue depth gauge; the rest is in-memory
+        await job_queue.stats()
+    except Exception:
+        logger.exception("Could not read job queue depth")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,56 @@
+import time
+from app.core.metrics import registry, start_request_phases
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+# Server-Timing entries, in the order they're reported
+PHASES = ("auth", "bcrypt", "db", "ser")
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task or body buffering) that records
+    per-route latency and adds a Server-Timing header breaking the request into
+    auth, bcrypt, DB and serialization time as recorded via app.core.metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = start_request_phases()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total = time.perf_counter() - start
+                entries = [f"{name};dur={phases[name] * 1000:.2f}" for name in PHASES if name in phases]
+                entries.append(f"total;dur={total * 1000:.2f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_FLIGHT.dec()
+            # FastAPI puts the matched route on the scope; use its template so
+            # /jobs/{job_id} is one series rather than one per id
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            )
@@ -1,19 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.payload import UserLogin, TokenResponse
+from app.core.config import settings
 from app.db.database import db
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_password_async, get_password_hash_async, needs_rehash, create_access_token
+from app.dependencies import limit_by_ip
 
 router = APIRouter()
 
-@router.post("/admin/login", response_model=TokenResponse)
+# Each attempt costs a full bcrypt verify, so attempts are rate limited per client IP
+@router.post("/admin/login", response_model=TokenResponse, dependencies=[Depends(limit_by_ip)])
 async def login(payload: UserLogin):
     user = await db.get_db()["users"].find_one({"email": payload.email})
-    if not user or not verify_password(payload.password, user["password"]):
+    if not user or not await verify_password_async(payload.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Transparently upgrade hashes created with a different cost factor
+    if needs_rehash(user["password"]):
+        new_hash = await get_password_hash_async(payload.password, shed=False)
+        await db.get_db()["users"].update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
     
-    access_token = create_access_token(data={"sub": user["email"]})
+    claims = {"sub": user["email"]}
+    if settings.AUTH_CLAIMS_ONLY and user.get("org_id") is not None:
+        claims.update({"org_id": str(user["org_id"]), "role": user.get("role")})
+    access_token = create_access_token(data=claims)
     return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+from app.services.job_service import job_queue
+
+router = APIRouter()
+
+@router.get("/jobs/metrics")
+async def get_job_metrics():
+    return await job_queue.stats()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    # No auth: the id is an unguessable uuid handed only to the requester, and the
+    # job usually outlives the account (e.g. deleting the org deletes its users).
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "id": job["_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "steps_done": job["steps_done"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "finished_at": job.get("finished_at"),
+    }
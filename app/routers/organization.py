@@ -1,37 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from app.core.ndjson import NDJSON_MEDIA_TYPE
+from app.core.responses import DuplexStreamingResponse
 from app.schemas.payload import OrgCreate, OrgUpdate
 from app.services.org_service import OrganizationService
-from app.dependencies import get_current_user
-from app.db.database import db
+from app.services.job_service import job_queue
+from app.dependencies import get_current_user, limit_by_ip, limit_by_tenant
+from app.db.tenants import tenants
 
 router = APIRouter()
 
-@router.post("/organizations", status_code=201)
+@router.post("/organizations", status_code=201, dependencies=[Depends(limit_by_ip)])
 async def create_organization(payload: OrgCreate):
     return await OrganizationService.create_organization(payload)
 
-@router.get("/organizations/me")
-async def get_my_organization(current_user: dict = Depends(get_current_user)):
-    org = await db.get_db()["organizations"].find_one({"name": current_user["org_name"]})
+async def _get_org_or_404(current_user: dict) -> dict:
+    org = await tenants.org_for_user(current_user)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    # Convert ObjectId to str if needed or use a Pydantic model for response
-    org["_id"] = str(org["_id"]) 
     return org
 
-@router.put("/organizations/me")
+@router.post("/organizations/bulk", dependencies=[Depends(limit_by_ip)])
+async def create_organizations_bulk(request: Request):
+    # Body is NDJSON, one OrgCreate per line; read as a stream and answered with one result line per row
+    return DuplexStreamingResponse(
+        OrganizationService.create_organizations_bulk(request.stream()),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+@router.get("/organizations/me", dependencies=[Depends(limit_by_tenant)])
+async def get_my_organization(
+    current_user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
+    # Served from pre-serialized bytes cached per org; a matching If-None-Match
+    # gets a 304 without touching the database or re-encoding anything.
+    org_id = current_user.get("org_id")
+    if org_id is None:
+        org_id = (await _get_org_or_404(current_user))["_id"]
+    view = await tenants.get_org_view(org_id)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    etag, body = view
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.put("/organizations/me", dependencies=[Depends(limit_by_tenant)])
 async def update_my_organization(
     payload: OrgUpdate, 
     current_user: dict = Depends(get_current_user)
 ):
-    return await OrganizationService.update_organization(current_user["org_name"], payload)
+    org = await _get_org_or_404(current_user)
+    return await OrganizationService.update_organization(org, payload)
 
-@router.delete("/organizations/me")
+@router.delete("/organizations/me", status_code=202, dependencies=[Depends(limit_by_tenant)])
 async def delete_my_organization(current_user: dict = Depends(get_current_user)):
-    name = current_user["org_name"]
-    org = await db.get_db()["organizations"].find_one({"name": name})
-    if org:
-        await db.get_db().drop_collection(org["collection_name"])
-        await db.get_db()["organizations"].delete_one({"name": name})
-        await db.get_db()["users"].delete_many({"org_name": name})
-    return {"message": "Organization deleted"}
+    # Dropping a large tenant takes a while, so it runs as a background job; poll GET /jobs/{job_id}
+    org = await tenants.org_for_user(current_user)
+    if not org:
+        return {"message": "Organization deleted", "job_id": None}
+    job_id = await job_queue.enqueue(
+        "delete_organization",
+        {
+            "org_id": org["_id"],
+            "org_name": org["name"],
+            "collection_name": org["collection_name"],
+            "connection_uri": org.get("connection_uri"),
+        },
+        owner=org["_id"],
+    )
+    return {"message": "Organization deletion scheduled", "job_id": job_id}
@@ -0,0 +1,149 @@
+import json
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.ndjson import NDJSON_MEDIA_TYPE, dumps_line, iter_lines
+from app.dependencies import get_tenant_collection, limit_by_tenant
+
+router = APIRouter(prefix="/tenant", dependencies=[Depends(limit_by_tenant)])
+
+MAX_IMPORT_ERRORS = 100
+
+def _object_id(doc_id: str) -> ObjectId:
+    try:
+        return ObjectId(doc_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+def _after_id(after: str) -> ObjectId:
+    try:
+        return ObjectId(after)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid 'after' cursor")
+
+def _projection(fields: Optional[str]) -> Optional[dict]:
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if any(name.startswith("$") for name in names):
+        raise HTTPException(status_code=400, detail="Invalid field name")
+    return {name: 1 for name in names}
+
+def _serialize(doc: dict) -> dict:
+    doc["_id"] = str(doc["_id"])
+    return doc
+
+def _body_document(doc: dict) -> dict:
+    # _id is always server-generated: keyset pagination relies on every _id being an ObjectId
+    doc.pop("_id", None)
+    return doc
+
+@router.get("/documents")
+async def list_documents(
+    after: Optional[str] = Query(None, description="Return documents after this _id (the previous page's next_after)"),
+    limit: int = Query(50, ge=1),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    collection=Depends(get_tenant_collection),
+):
+    # Keyset pagination on _id: every page is an index range scan, however deep
+    limit = min(limit, settings.TENANT_PAGE_MAX)
+    query = {"_id": {"$gt": _after_id(after)}} if after else {}
+    docs = await collection.find(query, _projection(fields)).sort("_id", 1).limit(limit).to_list(length=limit)
+    next_after = str(docs[-1]["_id"]) if len(docs) == limit else None
+    return {"items": [_serialize(doc) for doc in docs], "next_after": next_after}
+
+@router.post("/documents", status_code=201)
+async def create_document(doc: dict = Body(...), collection=Depends(get_tenant_collection)):
+    result = await collection.insert_one(_body_document(doc))
+    return {"_id": str(result.inserted_id)}
+
+@router.get("/documents/{doc_id}")
+async def get_document(
+    doc_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    collection=Depends(get_tenant_collection),
+):
+    doc = await collection.find_one({"_id": _object_id(doc_id)}, _projection(fields))
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return _serialize(doc)
+
+@router.put("/documents/{doc_id}")
+async def replace_document(doc_id: str, doc: dict = Body(...), collection=Depends(get_tenant_collection)):
+    result = await collection.replace_one({"_id": _object_id(doc_id)}, _body_document(doc))
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"_id": doc_id}
+
+@router.delete("/documents/{doc_id}")
+async def delete_document(doc_id: str, collection=Depends(get_tenant_collection)):
+    result = await collection.delete_one({"_id": _object_id(doc_id)})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"message": "Document deleted"}
+
+@router.get("/export")
+async def export_documents(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    collection=Depends(get_tenant_collection),
+):
+    # The cursor is drained one batch at a time as the client reads, so memory stays flat
+    cursor = collection.find({}, _projection(fields), batch_size=settings.TENANT_EXPORT_BATCH_SIZE).sort("_id", 1)
+
+    async def stream():
+        async for doc in cursor:
+            yield dumps_line(_serialize(doc))
+
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+
+@router.post("/import")
+async def import_documents(request: Request, collection=Depends(get_tenant_collection)):
+    # The body is read only as fast as chunks are written: each bulk_write is
+    # awaited before more lines are pulled, which pushes back on the client.
+    from pymongo import InsertOne
+    from pymongo.errors import BulkWriteError
+
+    inserted = 0
+    failed = 0
+    errors = []
+
+    def record_error(line_no: int, detail: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({"line": line_no, "detail": detail})
+
+    async def flush(chunk):
+        nonlocal inserted
+        try:
+            result = await collection.bulk_write([InsertOne(doc) for _, doc in chunk], ordered=False)
+            inserted += result.inserted_count
+        except BulkWriteError as e:
+            inserted += e.details.get("nInserted", 0)
+            for err in e.details.get("writeErrors", []):
+                record_error(chunk[err["index"]][0], err.get("errmsg", "Write failed"))
+
+    chunk = []
+    async for line_no, line in iter_lines(request.stream()):
+        if line is None:
+            record_error(line_no, f"Line exceeds {settings.NDJSON_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            doc = json.loads(line)
+        except ValueError:
+            doc = None
+        if not isinstance(doc, dict):
+            record_error(line_no, "Expected a JSON object")
+            continue
+        chunk.append((line_no, _body_document(doc)))
+        if len(chunk) >= settings.TENANT_IMPORT_CHUNK_SIZE:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+
+    # errors is capped at MAX_IMPORT_ERRORS; failed is the full count
+    return {"inserted": inserted, "failed": failed, "errors": errors}
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+JOB_DURATION = registry.histogram(
+    "job_duration_seconds", "Wall time of successful job runs", ["kind"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+JOBS_FINISHED = registry.counter("jobs_finished_total", "Job attempts by outcome", ["kind", "outcome"])
+QUEUE_DEPTH = registry.gauge("jobs_queue_depth", "Jobs waiting or running, as of the last scrape", ["status"])
+
+# A job handler turns the job payload into an ordered list of named steps.
+# Each step must be idempotent: after a crash or retry, steps already recorded
+# in `steps_done` are skipped and the rest run again.
+Step = Tuple[str, Callable[[], Awaitable[None]]]
+StepsFactory = Callable[[dict], List[Step]]
+
+class JobQueue:
+    """
+    Persistent job queue backed by the `jobs` collection, worked by in-process
+    asyncio tasks. Jobs are claimed with find_one_and_update and held under a
+    lease, so a job whose worker died is picked up again once the lease lapses.
+    """
+
+    def __init__(self, workers: int, max_attempts: int, lease_seconds: int, poll_interval: float):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, StepsFactory] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        # Start the workers on the first enqueue instead of from the lifespan (SERVERLESS)
+        self.autostart = False
+        # kind -> {"succeeded", "failed", "retried", "duration_sum", "duration_max"}
+        self._durations: Dict[str, dict] = {}
+
+    @property
+    def collection(self):
+        return db.get_db()["jobs"]
+
+    def register(self, kind: str, steps_factory: StepsFactory):
+        self._handlers[kind] = steps_factory
+
+    async def enqueue(self, kind: str, payload: dict, owner=None) -> str:
+        # One live job per (kind, owner): repeat requests get the existing job back
+        if owner is not None:
+            existing = await self.collection.find_one(
+                {"kind": kind, "owner": owner, "status": {"$in": ["queued", "running"]}}, {"_id": 1}
+            )
+            if existing:
+                return existing["_id"]
+
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "owner": owner,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "steps_done": [],
+            "progress": {"completed": 0, "total": None},
+            "error": None,
+            "created_at": now,
+            "available_at": now,
+            "lease_until": None,
+        }
+        await self.collection.insert_one(job)
+        if self.autostart:
+            self.start()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job["_id"]
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": job_id})
+
+    def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        # On Python < 3.12 wait_for swallows a cancel that races with the event
+        # being set, so idle workers also check this flag before waiting again
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self) -> Optional[dict]:
+        from pymongo import ReturnDocument
+
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "available_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": "running", "lease_until": now + timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _worker(self, index: int):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker %d failed to claim a job", index)
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Recording the outcome failed; the job is retried once its lease lapses
+                logger.exception("Job worker %d failed to record job %s", index, job["_id"])
+
+    async def _run(self, job: dict):
+        metrics = self._durations.setdefault(
+            job["kind"], {"succeeded": 0, "failed": 0, "retried": 0, "duration_sum": 0.0, "duration_max": 0.0}
+        )
+        started = time.perf_counter()
+        try:
+            steps = self._handlers[job["kind"]](job["payload"])
+            done = list(job["steps_done"])
+            for name, step in steps:
+                if name in done:
+                    continue
+                await step()
+                done.append(name)
+                await self.collection.update_one({"_id": job["_id"]}, {
+                    "$push": {"steps_done": name},
+                    "$set": {
+                        "progress": {"completed": len(done), "total": len(steps)},
+                        "lease_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds),
+                    },
+                })
+        except asyncio.CancelledError:
+            # Shutting down: leave the job leased; it is retried once the lease lapses
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %d", job["_id"], job["kind"], job["attempts"])
+            if job["attempts"] >= self.max_attempts:
+                metrics["failed"] += 1
+                JOBS_FINISHED.inc(kind=job["kind"], outcome="failed")
+                update = {"status": "failed", "finished_at": datetime.utcnow()}
+            else:
+                metrics["retried"] += 1
+                JOBS_FINISHED.inc(kind=job["kind"], outcome="retried")
+                backoff = timedelta(seconds=2 ** job["attempts"])
+                update = {"status": "queued", "available_at": datetime.utcnow() + backoff}
+            update["error"] = str(e)
+            await self.collection.update_one({"_id": job["_id"]}, {"$set": update})
+            return
+
+        elapsed = time.perf_counter() - started
+        metrics["succeeded"] += 1
+        metrics["duration_sum"] += elapsed
+        metrics["duration_max"] = max(metrics["duration_max"], elapsed)
+        JOBS_FINISHED.inc(kind=job["kind"], outcome="succeeded")
+        JOB_DURATION.observe(elapsed, kind=job["kind"])
+        await self.collection.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "succeeded", "error": None, "finished_at": datetime.utcnow()}},
+        )
+
+    async def stats(self) -> dict:
+        depth = {
+            doc["_id"]: doc["count"]
+            async for doc in self.collection.aggregate([
+                {"$match": {"status": {"$in": ["queued", "running"]}}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ])
+        }
+        for state in ("queued", "running"):
+            QUEUE_DEPTH.set(depth.get(state, 0), status=state)
+        return {
+            "queued": depth.get("queued", 0),
+            "running": depth.get("running", 0),
+            "workers": len(self._tasks),
+            "kinds": self._durations,
+        }
+
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+)
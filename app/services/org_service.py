@@ -1,11 +1,55 @@
+import asyncio
+import json
+import uuid
+from typing import AsyncIterable, AsyncIterator, List, Tuple
+from bson import ObjectId
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 from app.db.database import db
+from app.db.indexes import is_enforced, load_enforced
+from app.db.placement import place_tenant
+from app.db.tenants import tenants
 from app.schemas.payload import OrgCreate, OrgUpdate
-from app.core.security import get_password_hash
+from app.core.config import settings
+from app.core.ndjson import dumps_line, iter_lines
+from app.core.security import get_password_hash_async
+from app.dependencies import invalidate_principals
+
+def _duplicate_keys(exc) -> dict:
+    return (exc.details or {}).get("keyPattern", {})
+
+def _duplicate_detail(write_error: dict) -> str:
+    # Only the key fields: errmsg also quotes the duplicate value, which may itself contain "email"
+    keys = write_error.get("keyPattern") or write_error.get("keyValue") or {}
+    if "email" in keys:
+        return "Email already registered"
+    return "Organization name already taken"
+
+async def _check_unique_fallback(name: str = None, email: str = None, exclude_id=None):
+    """
+    Pre-checks for when the unique indexes haven't been confirmed (index bootstrap
+    failed, e.g. on existing duplicates). Racy, unlike the indexes, but better than
+    accepting duplicates outright. No-op once the indexes are in place.
+    """
+    database = db.get_db()
+    await load_enforced(database)
+    if name is not None and not is_enforced("organizations_name_unique"):
+        query = {"name": name}
+        if exclude_id is not None:
+            query["_id"] = {"$ne": exclude_id}
+        if await database["organizations"].find_one(query, {"_id": 1}):
+            raise HTTPException(status_code=400, detail="Organization name already taken")
+    if email is not None:
+        if not is_enforced("organizations_email_unique") and await database["organizations"].find_one({"email": email}, {"_id": 1}):
+            raise HTTPException(status_code=400, detail="Email already registered")
+        if not is_enforced("users_email_unique") and await database["users"].find_one({"email": email}, {"_id": 1}):
+            raise HTTPException(status_code=400, detail="Email already registered")
 
 class OrganizationService:
     @staticmethod
     async def create_organization(payload: OrgCreate):
+        from pymongo.errors import DuplicateKeyError
+
         # DEBUG: Verify what we received
         if len(payload.password) < 73:
              # Should be fine, but let's prove it
@@ -14,41 +58,46 @@ class OrganizationService:
              # This should have been caught by Pydantic
              raise ValueError(f"Password too long in Service! Len: {len(payload.password)}")
 
-        # Check existing
-        existing_org = await db.get_db()["organizations"].find_one({"email": payload.email})
-        if existing_org:
-            raise HTTPException(status_code=400, detail="Organization name already taken")
-        
-        existing_user = await db.get_db()["users"].find_one({"email": payload.email})
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email already registered")
+        await _check_unique_fallback(name=payload.name, email=payload.email)
 
-        # 2. Create Admin User & Save Meta
-        hashed_password = get_password_hash(payload.password)
+        # 1. Create Admin User & Save Meta
+        hashed_password = await get_password_hash_async(payload.password)
         
-        # Transaction-like sequence (MongoDB 4.0+ supports transactions, but keeping it simple for async motor)
-        # Save Org Metadata
+        # Uniqueness of name/email is enforced by the indexes in app/db/indexes.py,
+        # so we insert directly and map DuplicateKeyError instead of pre-checking.
+        # Save Org Metadata. The collection name is an immutable id, so renames never touch data.
         org_data = {
             "name": payload.name,
-            "collection_name": f"org_{payload.name}",
-            "connection_uri": "default_cluster"  # identifying which cluster this tenant lives in
+            "email": payload.email,
+            "collection_name": f"tenant_{uuid.uuid4().hex}",
+            "connection_uri": await place_tenant(payload.name)  # identifying which cluster this tenant lives in
         }
-        await db.get_db()["organizations"].insert_one(org_data)
+        try:
+            await db.get_db()["organizations"].insert_one(org_data)
+        except DuplicateKeyError as e:
+            if "email" in _duplicate_keys(e):
+                raise HTTPException(status_code=400, detail="Email already registered")
+            raise HTTPException(status_code=400, detail="Organization name already taken")
 
         # Save Admin User
         user_data = {
             "email": payload.email,
             "password": hashed_password,
-            "org_name": payload.name,
+            "org_id": org_data["_id"],
             "role": "admin"
         }
-        await db.get_db()["users"].insert_one(user_data)
+        try:
+            await db.get_db()["users"].insert_one(user_data)
+        except DuplicateKeyError:
+            # Undo the metadata insert so the name isn't left reserved
+            await db.get_db()["organizations"].delete_one({"_id": org_data["_id"]})
+            raise HTTPException(status_code=400, detail="Email already registered")
 
-        # 3. Create Dynamic Collection
+        # 2. Create Dynamic Collection
         # In Mongo, creating a document in a non-existent collection creates it, 
         # but we can explicitly create it to ensure it exists for the tenant.
         try:
-            await db.get_dynamic_collection(org_data["collection_name"]).insert_one({"info": "tenant_initialized"})
+            await db.get_cluster_db(org_data["connection_uri"]).create_collection(org_data["collection_name"])
         except Exception as e:
             # Rollback logic would go here in a real prod env
             pass
@@ -56,32 +105,165 @@ class OrganizationService:
         return {"message": "Organization created successfully", "org": payload.name}
 
     @staticmethod
-    async def update_organization(current_name: str, payload: OrgUpdate):
-        # 1. Check new name availability
-        if await db.get_db()["organizations"].find_one({"name": payload.name}):
-            raise HTTPException(status_code=400, detail="New organization name already taken")
+    async def create_organizations_bulk(body: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """
+        Provision organizations from an NDJSON stream of OrgCreate rows, yielding
+        one NDJSON result per input line. Rows are processed in chunks, so memory
+        stays bounded, and a bad row only fails itself.
+        """
+        chunk: List[Tuple[int, OrgCreate]] = []
+        async for line_no, line in iter_lines(body):
+            if line is None:
+                yield dumps_line({"line": line_no, "status": "error", "detail": f"Line exceeds {settings.NDJSON_MAX_LINE_BYTES} bytes"})
+                continue
+            try:
+                chunk.append((line_no, OrgCreate.model_validate(json.loads(line))))
+            except ValidationError as e:
+                yield dumps_line({"line": line_no, "status": "error",
+                                  "detail": e.errors(include_url=False, include_context=False, include_input=False)})
+            except ValueError:
+                yield dumps_line({"line": line_no, "status": "error", "detail": "Invalid JSON"})
+            if len(chunk) >= settings.BULK_CHUNK_SIZE:
+                for result in await OrganizationService._provision_chunk(chunk):
+                    yield dumps_line(result)
+                chunk = []
+        if chunk:
+            for result in await OrganizationService._provision_chunk(chunk):
+                yield dumps_line(result)
+
+    @staticmethod
+    async def _provision_chunk(rows: List[Tuple[int, OrgCreate]]) -> List[dict]:
+        from pymongo.errors import BulkWriteError
+
+        results = {line_no: {"line": line_no, "status": "created", "org": row.name} for line_no, row in rows}
+
+        def fail(index: int, detail: str):
+            results[rows[index][0]].update({"status": "error", "detail": detail})
 
-        # 2. Rename Collection (Migration)
-        old_collection_name = f"org_{current_name}"
-        new_collection_name = f"org_{payload.name}"
-        
         try:
-            # Rename the actual collection in MongoDB
-            await db.get_dynamic_collection(old_collection_name).rename(new_collection_name)
-        except Exception:
-            # If collection didn't exist for some reason, just proceed (or handle error)
-            pass
+            # Reject rows that are sure to fail before spending bcrypt work on them.
+            # The unique indexes still decide races with concurrent creates.
+            await OrganizationService._precheck_chunk(rows, fail)
+            pending = [i for i, (line_no, _) in enumerate(rows) if results[line_no]["status"] == "created"]
+
+            # The hasher caps batch work process-wide (BCRYPT_BATCH_SLOTS), so however
+            # many bulk streams run at once they can't fill the queue and get logins shed.
+            hashed = await asyncio.gather(*(
+                get_password_hash_async(rows[i][1].password, shed=False) for i in pending
+            ))
+            hashes = dict(zip(pending, hashed))
+
+            orgs = {i: {
+                "_id": ObjectId(),
+                "name": rows[i][1].name,
+                "email": rows[i][1].email,
+                "collection_name": f"tenant_{uuid.uuid4().hex}",
+                "connection_uri": await place_tenant(rows[i][1].name),
+            } for i in pending}
+            if pending:
+                try:
+                    await db.get_db()["organizations"].insert_many([orgs[i] for i in pending], ordered=False)
+                except BulkWriteError as e:
+                    for err in e.details["writeErrors"]:
+                        fail(pending[err["index"]], _duplicate_detail(err))
+
+            created = [i for i in pending if results[rows[i][0]]["status"] == "created"]
+            users = [{
+                "email": rows[i][1].email,
+                "password": hashes[i],
+                "org_id": orgs[i]["_id"],
+                "role": "admin",
+            } for i in created]
+            if users:
+                try:
+                    await db.get_db()["users"].insert_many(users, ordered=False)
+                except BulkWriteError as e:
+                    # Undo the metadata of rows whose admin user couldn't be created
+                    orphaned = [created[err["index"]] for err in e.details["writeErrors"]]
+                    for i in orphaned:
+                        fail(i, "Email already registered")
+                    await db.get_db()["organizations"].delete_many({"_id": {"$in": [orgs[i]["_id"] for i in orphaned]}})
+
+            ready = [i for i in created if results[rows[i][0]]["status"] == "created"]
+            # Each tenant is its own collection, so these can't share one batch; run them concurrently
+            await asyncio.gather(*(
+                db.get_cluster_db(orgs[i]["connection_uri"]).create_collection(orgs[i]["collection_name"])
+                for i in ready
+            ), return_exceptions=True)
+        except Exception as e:
+            for result in results.values():
+                if result["status"] == "created":
+                    result.update({"status": "error", "detail": f"Runtime Error: {e}"})
 
-        # 3. Update Meta
-        await db.get_db()["organizations"].update_one(
-            {"name": current_name},
-            {"$set": {"name": payload.name, "collection_name": new_collection_name}}
-        )
-
-        # 4. Update User
-        await db.get_db()["users"].update_many(
-            {"org_name": current_name},
-            {"$set": {"org_name": payload.name}}
-        )
+        return [results[line_no] for line_no, _ in rows]
+
+    @staticmethod
+    async def _precheck_chunk(rows: List[Tuple[int, OrgCreate]], fail):
+        names, emails = set(), set()
+        for i, (_, row) in enumerate(rows):
+            if row.name in names:
+                fail(i, "Organization name already taken")
+            elif row.email in emails:
+                fail(i, "Email already registered")
+            names.add(row.name)
+            emails.add(row.email)
+
+        database = db.get_db()
+        taken_names, taken_emails = set(), set()
+        async for org in database["organizations"].find(
+            {"$or": [{"name": {"$in": list(names)}}, {"email": {"$in": list(emails)}}]}, {"name": 1, "email": 1}
+        ):
+            taken_names.add(org.get("name"))
+            taken_emails.add(org.get("email"))
+        async for user in database["users"].find({"email": {"$in": list(emails)}}, {"email": 1}):
+            taken_emails.add(user["email"])
+        for i, (_, row) in enumerate(rows):
+            if row.name in taken_names:
+                fail(i, "Organization name already taken")
+            elif row.email in taken_emails:
+                fail(i, "Email already registered")
+
+    @staticmethod
+    async def update_organization(org: dict, payload: OrgUpdate):
+        from pymongo.errors import DuplicateKeyError
+
+        # Rename is a metadata-only update: the tenant collection is addressed by its immutable id.
+        # The unique index on name rejects a taken name.
+        await _check_unique_fallback(name=payload.name, exclude_id=org["_id"])
+        try:
+            await db.get_db()["organizations"].update_one(
+                {"_id": org["_id"]},
+                {"$set": {"name": payload.name}}
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="New organization name already taken")
+        tenants.invalidate(org)
+
+        # Users not yet moved to org_id by app.db.migrate_tenants still reference the name
+        if org["collection_name"].startswith("org_"):
+            await db.get_db()["users"].update_many(
+                {"org_name": org["name"]},
+                {"$set": {"org_name": payload.name}}
+            )
+            invalidate_principals(org=org)
         
         return {"message": "Organization updated successfully", "new_name": payload.name}
+
+    @staticmethod
+    def deletion_steps(payload: dict):
+        """Steps for the `delete_organization` job. Each one is safe to repeat."""
+        org_id, name = payload["org_id"], payload["org_name"]
+
+        async def delete_users():
+            # Users first, so nobody can sign in to a half-deleted tenant
+            await db.get_db()["users"].delete_many({"$or": [{"org_id": org_id}, {"org_name": name}]})
+            invalidate_principals(org={"_id": org_id, "name": name})
+
+        async def drop_collection():
+            await db.get_cluster_db(payload.get("connection_uri")).drop_collection(payload["collection_name"])
+
+        async def delete_metadata():
+            await db.get_db()["organizations"].delete_one({"_id": org_id})
+            tenants.invalidate({"_id": org_id, "name": name})
+
+        return [("users", delete_users), ("collection", drop_collection), ("metadata", delete_metadata)]
@@ -0,0 +1,130 @@
+"""
+End-to-end latency/throughput of the tenant lifecycle:
+create -> login -> get -> rename -> get -> delete, run as concurrent flows.
+
+Drives the real FastAPI app in-process (ASGI transport) against the in-memory
+Motor stand-in by default, or MongoDB (--backend mongo), or a running server
+(--base-url). Reports throughput and p50/p95/p99 per endpoint.
+
+    python -m benchmarks.api_flows --flows 500 --concurrency 50
+    python -m benchmarks.api_flows --save benchmarks/baselines/api_flows.json
+    python -m benchmarks.api_flows --compare benchmarks/baselines/api_flows.json --max-regression 0.25
+
+With --compare the exit status is 1 if any endpoint's p95 (see --metric) or the
+throughput regressed by more than --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+from benchmarks.harness import (
+    ConfigMismatch, add_backend_arguments, app_client, compare_to_baseline, save_baseline, summarize,
+)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, label, method, url, expected, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[label].append((time.perf_counter() - start) * 1000)
+        if response.status_code != expected:
+            self.errors[label] += 1
+            raise RuntimeError(f"{label}: {response.status_code} {response.text[:200]}")
+        return response
+
+
+async def flow(client, recorder: Recorder, run_id: str, index: int):
+    name = f"bench-{run_id}-{index}"
+    credentials = {"email": f"{name}@bench.example.com", "password": "bench-password"}
+    await recorder.call(client, "POST /organizations", "POST", "/organizations", 201,
+                        json={"name": name, **credentials})
+    login = await recorder.call(client, "POST /admin/login", "POST", "/admin/login", 200, json=credentials)
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await recorder.call(client, "GET /organizations/me", "GET", "/organizations/me", 200, headers=headers)
+    await recorder.call(client, "PUT /organizations/me", "PUT", "/organizations/me", 200,
+                        headers=headers, json={"name": f"{name}-renamed"})
+    await recorder.call(client, "GET /organizations/me", "GET", "/organizations/me", 200, headers=headers)
+    await recorder.call(client, "DELETE /organizations/me", "DELETE", "/organizations/me", 202, headers=headers)
+
+
+async def run(args) -> dict:
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    gate = asyncio.Semaphore(args.concurrency)
+    failures = 0
+
+    async def guarded(index):
+        nonlocal failures
+        async with gate:
+            try:
+                await flow(client, recorder, run_id, index)
+            except RuntimeError:
+                failures += 1
+
+    async with app_client(args.backend, args.db_latency_ms, args.base_url, args.bcrypt_rounds) as client:
+        # Warm-up flows aren't recorded
+        warmup = Recorder()
+        for i in range(min(5, args.flows)):
+            await flow(client, warmup, f"{run_id}w", i)
+        start = time.perf_counter()
+        await asyncio.gather(*(guarded(i) for i in range(args.flows)))
+        elapsed = time.perf_counter() - start
+
+    requests = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "config": {
+            "flows": args.flows,
+            "concurrency": args.concurrency,
+            "backend": "server" if args.base_url else args.backend,
+            "db_latency_ms": args.db_latency_ms,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "failed_flows": failures,
+        "flows_per_s": round(args.flows / elapsed, 1),
+        "requests_per_s": round(requests / elapsed, 1),
+        "endpoints": {
+            label: summarize(samples, recorder.errors[label]) for label, samples in sorted(recorder.samples.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    add_backend_arguments(parser)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms"])
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        save_baseline(args.save, result)
+    exit_code = 1 if result["failed_flows"] else 0
+    if args.compare:
+        try:
+            regressions = compare_to_baseline(result, args.compare, args.max_regression, args.metric, ["flows_per_s"])
+        except ConfigMismatch as e:
+            # A 50-flow run says nothing about a 200-flow baseline; rerun with matching options
+            print(f"NOT COMPARED: {e}")
+            sys.exit(2)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        exit_code = exit_code or (1 if regressions else 0)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
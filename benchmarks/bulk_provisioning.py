@@ -0,0 +1,94 @@
+"""
+Provisioning throughput (orgs/s): POST /organizations one by one vs. a single
+streamed POST /organizations/bulk.
+
+Needs a MongoDB reachable at MONGO_URL; everything it creates is prefixed with
+the run id and removed afterwards. Use a low BCRYPT_ROUNDS to measure the
+database path rather than bcrypt.
+
+    MONGO_URL=mongodb://localhost:27017 BCRYPT_ROUNDS=4 python -m benchmarks.bulk_provisioning --orgs 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from app.db.database import db
+from app.db.indexes import ensure_indexes
+from app.main import app
+from benchmarks.harness import disable_rate_limits
+
+
+def rows(prefix: str, count: int):
+    for i in range(count):
+        yield {"name": f"{prefix}-{i}", "email": f"{prefix}-{i}@bench.example.com", "password": "bench-password"}
+
+
+async def single(client: httpx.AsyncClient, prefix: str, count: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def create(row):
+        async with gate:
+            response = await client.post("/organizations", json=row)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(create(row) for row in rows(prefix, count)))
+    return time.perf_counter() - start
+
+
+async def bulk(client: httpx.AsyncClient, prefix: str, count: int) -> float:
+    async def body():
+        for row in rows(prefix, count):
+            yield json.dumps(row).encode() + b"\n"
+
+    start = time.perf_counter()
+    created = 0
+    async with client.stream("POST", "/organizations/bulk", content=body()) as response:
+        async for line in response.aiter_lines():
+            if line and json.loads(line)["status"] == "created":
+                created += 1
+    elapsed = time.perf_counter() - start
+    if created != count:
+        raise RuntimeError(f"bulk created {created}/{count}")
+    return elapsed
+
+
+async def cleanup(prefix: str):
+    database = db.get_db()
+    query = {"name": {"$regex": f"^{prefix}-"}}
+    async for org in database["organizations"].find(query, {"collection_name": 1}):
+        await database.drop_collection(org["collection_name"])
+        await database["users"].delete_many({"org_id": org["_id"]})
+    await database["organizations"].delete_many(query)
+
+
+async def main(count: int, concurrency: int):
+    await ensure_indexes(db.get_db())
+    disable_rate_limits()
+    run_id = uuid.uuid4().hex[:8]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        try:
+            single_s = await single(client, f"bench-single-{run_id}", count, concurrency)
+            bulk_s = await bulk(client, f"bench-bulk-{run_id}", count)
+        finally:
+            await cleanup(f"bench-single-{run_id}")
+            await cleanup(f"bench-bulk-{run_id}")
+    print(json.dumps({
+        "orgs": count,
+        "single_orgs_per_s": round(count / single_s, 1),
+        "bulk_orgs_per_s": round(count / bulk_s, 1),
+        "speedup": round(single_s / bulk_s, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orgs", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32, help="parallel requests for the single-create path")
+    args = parser.parse_args()
+    asyncio.run(main(args.orgs, args.concurrency))
@@ -0,0 +1,96 @@
+"""
+Cold-start cost of the serverless entry point: import time of api.index and
+time to first response (lifespan startup included), each measured in a fresh
+interpreter with SERVERLESS=true, as deployed on Vercel.
+
+    python -m benchmarks.cold_start --runs 10
+    python -m benchmarks.cold_start --save benchmarks/baselines/cold_start.json
+    python -m benchmarks.cold_start --compare benchmarks/baselines/cold_start.json --max-regression 0.2
+
+The first response is GET /health through the ASGI app. Neither it nor the
+serverless lifespan touches MongoDB, so no database is required; a startup that
+starts to (say, an eager connect or index bootstrap) shows up here as a
+regression, or as a timeout error without a reachable MONGO_URL.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, time
+start = time.perf_counter()
+from api.index import app
+imported = time.perf_counter()
+import httpx
+
+async def first_response():
+    # ASGITransport doesn't send lifespan events; run startup the way the server would
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+        return started, time.perf_counter()
+
+started, done = asyncio.run(first_response())
+# What startup and the first request pulled in (httpx aside)
+heavy = ("motor", "pymongo", "jose", "bcrypt", "email_validator")
+loaded_by_app = sorted(m for m in heavy if m in __import__("sys").modules)
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_response_ms": (done - start) * 1000,
+    "heavy_modules_loaded": loaded_by_app,
+}))
+"""
+
+
+def measure(runs: int) -> dict:
+    samples = []
+    env = {**os.environ, "SERVERLESS": "true"}
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], check=True, capture_output=True, text=True, env=env)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "runs": runs,
+        "import_ms_median": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "startup_ms_median": round(statistics.median(s["startup_ms"] for s in samples), 1),
+        "first_response_ms_median": round(statistics.median(s["first_response_ms"] for s in samples), 1),
+        "heavy_modules_loaded": samples[-1]["heavy_modules_loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failed = False
+        for key in ("import_ms_median", "first_response_ms_median"):
+            limit = baseline[key] * (1 + args.max_regression)
+            if result[key] > limit:
+                print(f"REGRESSION {key}: {result[key]} > {limit:.1f} (baseline {baseline[key]})")
+                failed = True
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
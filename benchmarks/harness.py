@@ -0,0 +1,112 @@
+"""Shared plumbing for the benchmark scripts: app wiring, percentiles and JSON baselines."""
+import json
+import os
+import statistics
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.db.database import db
+from app.dependencies import ip_limiter, tenant_concurrency, tenant_limiter
+from app.main import app
+from benchmarks.memory_motor import MemoryMotorClient
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_ms: List[float], errors: int = 0) -> dict:
+    if not samples_ms:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(samples_ms),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(samples_ms), 2),
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+    }
+
+
+def disable_rate_limits():
+    # Every benchmark request comes from one client IP and a handful of tenants;
+    # measure the app, not the limiter
+    ip_limiter.rate = 0
+    tenant_limiter.rate = 0
+    tenant_concurrency.limit = 0
+
+
+def add_backend_arguments(parser):
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory",
+                        help="in-memory Motor stand-in, or the MongoDB at MONGO_URL")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="per-operation latency added by the in-memory backend")
+    parser.add_argument("--base-url", help="drive a running server (e.g. http://127.0.0.1:8000) instead of in-process")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4,
+                        help="bcrypt cost for the in-process app; low so the database path dominates")
+
+
+@asynccontextmanager
+async def app_client(backend: str = "memory", db_latency_ms: float = 0.0,
+                     base_url: Optional[str] = None, bcrypt_rounds: Optional[int] = None):
+    """Yield an httpx client bound to the app, with its lifespan (indexes, job workers) running."""
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+            yield client
+        return
+
+    if bcrypt_rounds:
+        settings.BCRYPT_ROUNDS = bcrypt_rounds
+    disable_rate_limits()
+    if backend == "memory":
+        db.client = MemoryMotorClient(latency=db_latency_ms / 1000)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            yield client
+
+
+def save_baseline(path: str, result: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+
+class ConfigMismatch(ValueError):
+    """The run and the baseline were measured under different settings, so they can't be compared."""
+
+
+def compare_to_baseline(result: dict, path: str, max_regression: float,
+                        metric: str = "p95_ms", throughput_keys: Iterable[str] = ()) -> List[str]:
+    """
+    Return human-readable regressions of `result` against the baseline at `path`.
+    Raises ConfigMismatch if the two were run with a different `config`.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    ours, theirs = result.get("config", {}), baseline.get("config", {})
+    differences = [
+        f"{key}={ours.get(key)!r} (baseline {theirs.get(key)!r})"
+        for key in sorted(set(ours) | set(theirs)) if ours.get(key) != theirs.get(key)
+    ]
+    if differences:
+        raise ConfigMismatch(f"config differs from {path}: " + ", ".join(differences))
+    regressions = []
+    for name, stats in result.get("endpoints", {}).items():
+        before: Dict = baseline.get("endpoints", {}).get(name)
+        if not before or metric not in before or metric not in stats:
+            continue
+        limit = before[metric] * (1 + max_regression)
+        if stats[metric] > limit:
+            regressions.append(f"{name} {metric}: {stats[metric]} > {limit:.2f} (baseline {before[metric]})")
+    for key in throughput_keys:
+        if key in baseline and key in result:
+            floor = baseline[key] / (1 + max_regression)
+            if result[key] < floor:
+                regressions.append(f"{key}: {result[key]} < {floor:.2f} (baseline {baseline[key]})")
+    return regressions
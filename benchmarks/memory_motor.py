@@ -0,0 +1,356 @@
+"""
+In-memory stand-in for the subset of AsyncIOMotorClient the app uses, so the
+benchmarks can drive real routes without a mongod. Not a general Mongo
+emulator: it covers the queries, updates and index options found in app/.
+
+Unique indexes (including partialFilterExpression) are enforced and raise the
+same DuplicateKeyError/BulkWriteError as pymongo, so the create/rename error
+paths behave as they do against a server. `latency` adds a per-operation
+sleep to approximate a network round trip.
+"""
+import asyncio
+import copy
+import re
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo import InsertOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def _set(doc, path, value):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _unset(doc, path):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.get(part, {})
+    doc.pop(leaf, None)
+
+
+def _compare(value, op, operand):
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$type":
+        return operand == "string" and isinstance(value, str)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(operand, value) is not None
+    if value is _MISSING or value is None:
+        return False
+    try:
+        return {"$gt": value > operand, "$gte": value >= operand,
+                "$lt": value < operand, "$lte": value <= operand}[op]
+    except TypeError:
+        return False
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif (None if value is _MISSING else value) != condition:
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    out = {"_id": doc["_id"]} if projection.get("_id", 1) else {}
+    for field, include in projection.items():
+        if include and field != "_id":
+            value = _get(doc, field)
+            if value is not _MISSING:
+                _set(out, field, copy.deepcopy(value))
+    return out
+
+
+class _Cursor:
+    def __init__(self, docs, projection):
+        self._docs = docs
+        self._projection = projection
+
+    def sort(self, key, direction=1):
+        self._docs.sort(key=lambda d: d.get(key), reverse=direction == -1)
+        return self
+
+    def limit(self, count):
+        self._docs = self._docs[:count] if count else self._docs
+        return self
+
+    async def to_list(self, length=None):
+        return [_project(d, self._projection) for d in self._docs[:length]]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._docs:
+            yield _project(doc, self._projection)
+
+
+class MemoryCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.docs = {}
+        # Unique indexes: {"fields": tuple, "partial": filter or None, "keys": {key tuple: _id}}
+        self.indexes = []
+
+    async def _io(self):
+        await asyncio.sleep(self.database.client.latency)
+
+    def _index_keys(self, doc):
+        for index in self.indexes:
+            if index["partial"] and not matches(doc, index["partial"]):
+                continue
+            # A missing field indexes as null, as in MongoDB
+            key = tuple(None if (v := _get(doc, f)) is _MISSING else repr(v) for f in index["fields"])
+            yield index, key
+
+    def _check_unique(self, doc, replacing):
+        if not replacing and doc["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key _id", 11000, {"keyPattern": {"_id": 1}})
+        for index, key in self._index_keys(doc):
+            owner = index["keys"].get(key)
+            if owner is not None and owner != doc["_id"]:
+                fields = index["fields"]
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key {fields}", 11000, {"keyPattern": {f: 1 for f in fields}}
+                )
+
+    def _store(self, doc, replacing=False):
+        self._check_unique(doc, replacing)
+        self._remove(doc["_id"])
+        self.docs[doc["_id"]] = doc
+        for index, key in self._index_keys(doc):
+            index["keys"][key] = doc["_id"]
+
+    def _remove(self, doc_id):
+        old = self.docs.pop(doc_id, None)
+        if old is not None:
+            for index, key in self._index_keys(old):
+                index["keys"].pop(key, None)
+
+    def _insert(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self._store(copy.deepcopy(doc))
+        return doc["_id"]
+
+    def _find(self, query):
+        query = query or {}
+        # Fast path for the common lookup by _id
+        if isinstance(query.get("_id"), (ObjectId, str)):
+            doc = self.docs.get(query["_id"])
+            return [doc] if doc is not None and matches(doc, query) else []
+        # ...and by a field with a unique index, like the real server would use
+        if len(query) == 1:
+            (field, value), = query.items()
+            for index in self.indexes:
+                if index["fields"] == (field,) and not index["partial"] and not isinstance(value, dict):
+                    doc = self.docs.get(index["keys"].get((repr(value),)))
+                    return [doc] if doc is not None else []
+        return [d for d in self.docs.values() if matches(d, query)]
+
+    def _apply(self, doc, update, inserting=False):
+        updated = copy.deepcopy(doc)
+        for op, fields in update.items():
+            for path, value in fields.items():
+                if op == "$set" or (op == "$setOnInsert" and inserting):
+                    _set(updated, path, copy.deepcopy(value))
+                elif op == "$unset":
+                    _unset(updated, path)
+                elif op == "$inc":
+                    current = _get(updated, path)
+                    _set(updated, path, (0 if current is _MISSING else current) + value)
+                elif op == "$push":
+                    current = _get(updated, path)
+                    _set(updated, path, ([] if current is _MISSING else current) + [value])
+        self._store(updated, replacing=True)
+        return updated
+
+    async def create_index(self, keys, unique=False, partialFilterExpression=None, **_):
+        fields = tuple(k for k, _ in keys)
+        if unique and not any(index["fields"] == fields for index in self.indexes):
+            index = {"fields": fields, "partial": partialFilterExpression, "keys": {}}
+            self.indexes.append(index)
+            for doc in self.docs.values():
+                for idx, key in self._index_keys(doc):
+                    if idx is index:
+                        index["keys"][key] = doc["_id"]
+        return "_".join(fields)
+
+    async def insert_one(self, doc):
+        await self._io()
+        return SimpleNamespace(inserted_id=self._insert(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        await self._io()
+        ids, errors = [], []
+        for index, doc in enumerate(docs):
+            try:
+                ids.append(self._insert(doc))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e), "keyPattern": e.details["keyPattern"]})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(ids)})
+        return SimpleNamespace(inserted_ids=ids)
+
+    async def bulk_write(self, requests, ordered=True):
+        docs = [request._doc for request in requests if isinstance(request, InsertOne)]
+        result = await self.insert_many(docs, ordered=ordered)
+        return SimpleNamespace(inserted_count=len(result.inserted_ids))
+
+    async def find_one(self, query=None, projection=None):
+        await self._io()
+        found = self._find(query)
+        return _project(found[0], projection) if found else None
+
+    def find(self, query=None, projection=None, batch_size=None):
+        return _Cursor(self._find(query), projection)
+
+    async def update_one(self, query, update, upsert=False):
+        await self._io()
+        found = self._find(query)
+        if found:
+            self._apply(found[0], update)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            base = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            base.setdefault("_id", ObjectId())
+            self._apply(base, update, inserting=True)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=base["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query, update):
+        await self._io()
+        found = self._find(query)
+        for doc in found:
+            self._apply(doc, update)
+        return SimpleNamespace(matched_count=len(found), modified_count=len(found))
+
+    async def replace_one(self, query, replacement):
+        await self._io()
+        found = self._find(query)
+        if not found:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        new = copy.deepcopy(replacement)
+        new["_id"] = found[0]["_id"]
+        self._store(new, replacing=True)
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+    async def find_one_and_update(self, query, update, sort=None, return_document=ReturnDocument.BEFORE):
+        await self._io()
+        found = self._find(query)
+        for key, direction in reversed(sort or []):
+            found.sort(key=lambda d: d.get(key), reverse=direction == -1)
+        if not found:
+            return None
+        updated = self._apply(found[0], update)
+        return copy.deepcopy(updated if return_document == ReturnDocument.AFTER else found[0])
+
+    async def delete_one(self, query):
+        await self._io()
+        found = self._find(query)
+        if found:
+            self._remove(found[0]["_id"])
+        return SimpleNamespace(deleted_count=len(found[:1]))
+
+    async def delete_many(self, query):
+        await self._io()
+        found = self._find(query)
+        for doc in found:
+            self._remove(doc["_id"])
+        return SimpleNamespace(deleted_count=len(found))
+
+    async def count_documents(self, query):
+        await self._io()
+        return len(self._find(query))
+
+    def aggregate(self, pipeline):
+        # $match, $limit and $group on one field with $sum/$push accumulators: the shapes used in app/
+        docs = list(self.docs.values())
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [d for d in docs if matches(d, stage["$match"])]
+            elif "$limit" in stage:
+                docs = docs[:stage["$limit"]]
+            elif "$group" in stage:
+                spec = dict(stage["$group"])
+                field = spec.pop("_id").lstrip("$")
+                groups = {}
+                for doc in docs:
+                    key = None if (v := _get(doc, field)) is _MISSING else v
+                    row = groups.setdefault(repr(key), {"_id": key, **{name: 0 if "$sum" in acc else []
+                                                                      for name, acc in spec.items()}})
+                    for name, acc in spec.items():
+                        if "$sum" in acc:
+                            row[name] += acc["$sum"]
+                        else:
+                            row[name].append(_get(doc, acc["$push"].lstrip("$")))
+                docs = list(groups.values())
+        return _Cursor(docs, None)
+
+
+class MemoryDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = MemoryCollection(self, name)
+        return self.collections[name]
+
+    async def create_collection(self, name):
+        await asyncio.sleep(self.client.latency)
+        return self[name]
+
+    async def drop_collection(self, name):
+        await asyncio.sleep(self.client.latency)
+        self.collections.pop(name, None)
+
+    async def command(self, name):
+        await asyncio.sleep(self.client.latency)
+        return {"ok": 1}
+
+
+class MemoryMotorClient:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.databases = {}
+
+    def __getitem__(self, name):
+        if name not in self.databases:
+            self.databases[name] = MemoryDatabase(self, name)
+        return self.databases[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,70 @@
+"""
+Polled GET /organizations/me throughput, as the dashboard does it.
+
+Three modes against the same org:
+- uncached:    metadata cache disabled, so each poll reads Mongo and re-encodes (the old behaviour)
+- cached:      pre-serialized bytes served from the per-org cache
+- conditional: the client sends If-None-Match and gets 304 Not Modified
+
+    python -m benchmarks.org_polling --polls 5000 --concurrency 20 --db-latency-ms 1
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.db.tenants import tenants
+from benchmarks.harness import add_backend_arguments, app_client, summarize
+
+
+async def poll(client, headers, polls, concurrency, expected):
+    gate = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            response = await client.get("/organizations/me", headers=headers)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == expected, response.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(polls)))
+    elapsed = time.perf_counter() - start
+    return {"polls_per_s": round(polls / elapsed, 1), **summarize(samples)}
+
+
+async def main(args):
+    results = {}
+    async with app_client(args.backend, args.db_latency_ms, args.base_url, args.bcrypt_rounds) as client:
+        credentials = {"email": "poll@bench.example.com", "password": "bench-password"}
+        await client.post("/organizations", json={"name": f"poll-{time.time_ns()}", **credentials})
+        login = await client.post("/admin/login", json=credentials)
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        view_cache, org_cache = tenants._views.maxsize, tenants._orgs.maxsize
+        tenants._views.maxsize = tenants._orgs.maxsize = 0
+        tenants._views.clear()
+        tenants._orgs.clear()
+        results["uncached"] = await poll(client, headers, args.polls, args.concurrency, 200)
+        tenants._views.maxsize, tenants._orgs.maxsize = view_cache, org_cache
+
+        first = await client.get("/organizations/me", headers=headers)
+        results["cached"] = await poll(client, headers, args.polls, args.concurrency, 200)
+        conditional = {**headers, "If-None-Match": first.headers["etag"]}
+        results["conditional"] = await poll(client, conditional, args.polls, args.concurrency, 304)
+
+        await client.delete("/organizations/me", headers=headers)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    add_backend_arguments(parser)
+    parser.set_defaults(db_latency_ms=1.0)
+    args = parser.parse_args()
+    if args.base_url:
+        parser.error("org_polling toggles the in-process cache; run it in-process")
+    asyncio.run(main(args))
@@ -0,0 +1,62 @@
+"""
+Tests run against the in-memory Motor stand-in used by the benchmarks
+(benchmarks/memory_motor.py), so no mongod is needed. Async tests use the
+anyio plugin that ships with Starlette.
+"""
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.db.database import DATABASE_NAME, db
+from app.db.tenants import tenants
+from app.dependencies import ip_limiter, principal_cache, tenant_concurrency, tenant_limiter, token_cache
+from app.main import app
+from benchmarks.memory_motor import MemoryMotorClient
+
+ADMIN = {"email": "admin@acme.com", "password": "password123"}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def memory_db():
+    """The master database on a fresh in-memory client, swapped in for the process-wide one."""
+    previous_client, previous_clusters = db.client, db.cluster_clients
+    db.client = MemoryMotorClient()
+    db.cluster_clients = {}
+    for cache in (tenants._orgs, tenants._names, tenants._views, principal_cache, token_cache):
+        cache.clear()
+    yield db.client[DATABASE_NAME]
+    db.client, db.cluster_clients = previous_client, previous_clusters
+
+
+@pytest.fixture
+async def client(memory_db, monkeypatch):
+    """An httpx client for the app (without its lifespan), with cheap bcrypt and no rate limits."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(ip_limiter, "rate", 0)
+    monkeypatch.setattr(tenant_limiter, "rate", 0)
+    monkeypatch.setattr(tenant_concurrency, "limit", 0)
+    # Unhandled errors come back as the app's 500 instead of being re-raised here
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def auth_headers(client) -> dict:
+    """Bearer headers for the admin of a freshly created "acme" organization."""
+    assert (await client.post("/organizations", json={"name": "acme", **ADMIN})).status_code == 201
+    login = await client.post("/admin/login", json=ADMIN)
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.fixture
+def cluster_b(memory_db, monkeypatch):
+    """A second in-memory cluster, configured as "cluster_b" in MONGO_CLUSTERS."""
+    monkeypatch.setattr(settings, "MONGO_CLUSTERS", {"cluster_b": "mongodb://cluster-b"})
+    db.cluster_clients["cluster_b"] = MemoryMotorClient()
+    return db.cluster_clients["cluster_b"][DATABASE_NAME]
@@ -0,0 +1,99 @@
+import json
+
+import anyio
+import pytest
+
+from app.core.config import settings
+from app.services import org_service
+
+pytestmark = pytest.mark.anyio
+
+
+def _row(n, **overrides) -> dict:
+    return {"name": f"org{n}", "email": f"admin{n}@example.com", "password": "password123", **overrides}
+
+
+def _ndjson(rows) -> bytes:
+    return b"".join(row if isinstance(row, bytes) else json.dumps(row).encode() + b"\n" for row in rows)
+
+
+async def _bulk(client, body: bytes, chunk_size: int = 7) -> list:
+    async def stream():
+        # Small, line-splitting chunks, so the app reads the body while it answers
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    with anyio.fail_after(10):
+        response = await client.post("/organizations/bulk", content=stream())
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.fixture
+def hashed(monkeypatch) -> list:
+    """Passwords that reached bcrypt."""
+    calls = []
+    original = org_service.get_password_hash_async
+
+    async def hash_async(password, **kwargs):
+        calls.append(password)
+        return await original(password, **kwargs)
+
+    monkeypatch.setattr(org_service, "get_password_hash_async", hash_async)
+    return calls
+
+
+async def test_streamed_request_completes_across_chunks(client, memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 3)
+    results = await _bulk(client, _ndjson(_row(n) for n in range(8)))
+    assert [(r["line"], r["status"], r["org"]) for r in results] == [(n + 1, "created", f"org{n}") for n in range(8)]
+    assert await memory_db["organizations"].count_documents({}) == 8
+    assert await memory_db["users"].count_documents({}) == 8
+
+
+async def test_each_row_fails_on_its_own(client, memory_db, hashed):
+    await _bulk(client, _ndjson([_row(0)]))
+    hashed.clear()
+    results = await _bulk(client, _ndjson([
+        _row(1),
+        b"{not json\n",
+        _row(2, email="not-an-email"),
+        _row(0, email="other@example.com"),  # name taken by an existing org
+        _row(3, email="admin0@example.com"),  # email taken by an existing org
+        _row(1, email="again@example.com"),  # name repeated within the chunk
+        _row(4, name="org4", email="admin1@example.com"),  # email repeated within the chunk
+        _row(5),
+    ]))
+    by_line = {r["line"]: r for r in results}
+    assert [by_line[n]["status"] for n in range(1, 9)] == ["created"] + ["error"] * 6 + ["created"]
+    assert by_line[2]["detail"] == "Invalid JSON"
+    assert by_line[3]["detail"][0]["loc"] == ["email"]
+    assert by_line[4]["detail"] == "Organization name already taken"
+    assert by_line[5]["detail"] == "Email already registered"
+    assert by_line[6]["detail"] == "Organization name already taken"
+    assert by_line[7]["detail"] == "Email already registered"
+    # Rows rejected by the chunk pre-checks never reach bcrypt
+    assert len(hashed) == 2
+    assert {org["name"] async for org in memory_db["organizations"].find({})} == {"org0", "org1", "org5"}
+
+
+async def test_over_long_line_fails_alone(client, memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "NDJSON_MAX_LINE_BYTES", 200)
+    long_row = _row(1, name="x" * 500)
+    results = await _bulk(client, _ndjson([_row(0), long_row, _row(2)]))
+    assert [(r["line"], r["status"]) for r in results] == [(2, "error"), (1, "created"), (3, "created")]
+    assert results[0]["detail"] == "Line exceeds 200 bytes"
+
+
+def test_duplicate_detail_reads_the_key_not_the_message():
+    # A name containing "email" shows up in errmsg's dup key text
+    name_error = {
+        "code": 11000,
+        "errmsg": 'E11000 duplicate key error collection: wedding_app.organizations index: '
+                  'organizations_name_unique dup key: { name: "email-co" }',
+        "keyPattern": {"name": 1},
+        "keyValue": {"name": "email-co"},
+    }
+    assert org_service._duplicate_detail(name_error) == "Organization name already taken"
+    email_error = {"code": 11000, "errmsg": "E11000", "keyValue": {"email": "a@example.com"}}
+    assert org_service._duplicate_detail(email_error) == "Email already registered"
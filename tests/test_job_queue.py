@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.job_service import JobQueue
+
+pytestmark = pytest.mark.anyio
+
+
+class StepFailed(Exception):
+    pass
+
+
+def _flaky_steps(calls: list, failures: dict):
+    """Steps a, b, c; b raises while failures["b"] > 0."""
+    def factory(payload):
+        def step(name):
+            async def run():
+                calls.append(name)
+                if failures.get(name, 0) > 0:
+                    failures[name] -= 1
+                    raise StepFailed(name)
+            return name, run
+        return [step("a"), step("b"), step("c")]
+    return factory
+
+
+async def _run_next(queue: JobQueue):
+    job = await queue._claim()
+    assert job is not None
+    await queue._run(job)
+
+
+async def _make_due(memory_db, job_id):
+    # Skip the retry backoff
+    await memory_db["jobs"].update_one({"_id": job_id}, {"$set": {"available_at": datetime.utcnow()}})
+
+
+async def test_failed_step_is_retried_and_completed_steps_are_skipped(memory_db):
+    calls, failures = [], {"b": 1}
+    queue = JobQueue(workers=1, max_attempts=3, lease_seconds=60, poll_interval=60)
+    queue.register("demo", _flaky_steps(calls, failures))
+    job_id = await queue.enqueue("demo", {})
+
+    await _run_next(queue)
+    job = await queue.get(job_id)
+    assert job["status"] == "queued"
+    assert job["steps_done"] == ["a"]
+    assert job["attempts"] == 1
+    assert job["available_at"] > datetime.utcnow()
+    assert job["error"] == "b"
+    # Backing off: not claimable yet
+    assert await queue._claim() is None
+
+    await _make_due(memory_db, job_id)
+    await _run_next(queue)
+    job = await queue.get(job_id)
+    assert job["status"] == "succeeded"
+    assert job["steps_done"] == ["a", "b", "c"]
+    assert calls == ["a", "b", "b", "c"]
+
+
+async def test_job_fails_after_max_attempts(memory_db):
+    calls = []
+    queue = JobQueue(workers=1, max_attempts=2, lease_seconds=60, poll_interval=60)
+    queue.register("demo", _flaky_steps(calls, {"b": 10}))
+    job_id = await queue.enqueue("demo", {})
+
+    await _run_next(queue)
+    await _make_due(memory_db, job_id)
+    await _run_next(queue)
+
+    job = await queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert calls == ["a", "b", "b"]
+
+
+async def test_expired_lease_is_reclaimed(memory_db):
+    queue = JobQueue(workers=1, max_attempts=3, lease_seconds=60, poll_interval=60)
+    queue.register("demo", _flaky_steps([], {}))
+    job_id = await queue.enqueue("demo", {})
+    assert (await queue._claim())["_id"] == job_id
+    # Worker died mid-job; nothing else can claim it until the lease lapses
+    assert await queue._claim() is None
+    await memory_db["jobs"].update_one({"_id": job_id}, {"$set": {"lease_until": datetime(2000, 1, 1)}})
+    job = await queue._claim()
+    assert job["_id"] == job_id and job["attempts"] == 2
+
+
+async def test_enqueue_dedupes_live_jobs_per_owner(memory_db):
+    queue = JobQueue(workers=1, max_attempts=3, lease_seconds=60, poll_interval=60)
+    first = await queue.enqueue("demo", {}, owner="org-1")
+    assert await queue.enqueue("demo", {}, owner="org-1") == first
+    assert await queue.enqueue("demo", {}, owner="org-2") != first
+
+
+async def test_stop_returns_when_an_enqueue_races_shutdown(memory_db):
+    queue = JobQueue(workers=2, max_attempts=3, lease_seconds=60, poll_interval=60)
+    queue.register("demo", _flaky_steps([], {}))
+    queue.start()
+    await asyncio.sleep(0.01)
+    await queue.enqueue("demo", {})
+    await asyncio.wait_for(queue.stop(), timeout=5)
+
+
+async def test_worker_survives_a_failure_to_record_the_outcome(memory_db, monkeypatch):
+    queue = JobQueue(workers=1, max_attempts=3, lease_seconds=60, poll_interval=0.05)
+    queue.register("broken", _flaky_steps([], {"a": 1}))
+    queue.register("demo", _flaky_steps([], {}))
+    jobs = memory_db["jobs"]
+    original = jobs.update_one
+    failures = [ConnectionError("connection reset")]
+
+    async def update_one(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(jobs, "update_one", update_one)
+    queue.start()
+    try:
+        # The step fails, then so does writing the retry back; the job keeps its lease
+        broken_id = await queue.enqueue("broken", {})
+        job_id = await queue.enqueue("demo", {})
+        for _ in range(100):
+            if (await queue.get(job_id))["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        assert (await queue.get(job_id))["status"] == "succeeded"
+        assert (await queue.get(broken_id))["status"] == "running"
+        assert not failures
+    finally:
+        await asyncio.wait_for(queue.stop(), timeout=5)
@@ -0,0 +1,41 @@
+import pytest
+
+from app.core.config import settings
+from app.db import indexes
+from app.db.database import db
+from app.main import app
+from app.services.job_service import job_queue
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def serverless(monkeypatch):
+    monkeypatch.setattr(settings, "SERVERLESS", True)
+    monkeypatch.setattr(job_queue, "autostart", False)
+    monkeypatch.setattr(indexes, "_enforced_unique", set())
+    monkeypatch.setattr(indexes, "_loaded", False)
+
+
+async def test_serverless_startup_leaves_mongo_and_workers_for_later(serverless, memory_db, monkeypatch):
+    monkeypatch.setattr(db, "client", None)
+    async with app.router.lifespan_context(app):
+        assert db.client is None
+        assert job_queue._tasks == []
+        # Workers start with the first job this instance enqueues
+        monkeypatch.setattr(db, "client", memory_db.client)
+        await job_queue.enqueue("delete_organization", {"org_id": "missing"})
+        assert len(job_queue._tasks) == settings.JOB_WORKERS
+    assert job_queue._tasks == []
+
+
+async def test_enforced_indexes_are_read_back_once_without_bootstrap(serverless, memory_db):
+    await memory_db["schema_migrations"].insert_one({"_id": 3})
+    await memory_db["schema_migrations"].insert_one({"_id": 5})
+    await indexes.load_enforced(memory_db)
+    assert indexes.is_enforced("organizations_name_unique")
+    assert not indexes.is_enforced("users_email_unique")
+
+    await memory_db["schema_migrations"].insert_one({"_id": 1})
+    await indexes.load_enforced(memory_db)
+    assert not indexes.is_enforced("users_email_unique")
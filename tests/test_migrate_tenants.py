@@ -0,0 +1,147 @@
+import pytest
+from bson import ObjectId
+
+from app.db import batch_copy, migrate_tenants
+from app.db.batch_copy import CollectionMove
+from app.db.tenants import writes_frozen
+
+pytestmark = pytest.mark.anyio
+
+
+class Crash(Exception):
+    pass
+
+
+async def _legacy_tenant(database, docs: int = 7) -> dict:
+    await database["organizations"].insert_one({"name": "acme", "collection_name": "org_acme"})
+    await database["users"].insert_one({"email": "admin@acme.com", "org_name": "acme"})
+    for i in range(docs):
+        await database["org_acme"].insert_one({"i": i})
+    return await database["organizations"].find_one({"name": "acme"})
+
+
+def _crash_when_persisting(monkeypatch, phase: str, after: bool = True):
+    """Make the migration die right after (or before) it records `phase`."""
+    original = CollectionMove.set_phase
+
+    async def set_phase(move, new_phase, extra=None):
+        if new_phase == phase and not after:
+            raise Crash(phase)
+        await original(move, new_phase, extra)
+        if new_phase == phase:
+            raise Crash(phase)
+
+    monkeypatch.setattr(CollectionMove, "set_phase", set_phase)
+
+
+async def _assert_migrated(database, expected: set):
+    org = await database["organizations"].find_one({"name": "acme"})
+    assert org["collection_name"].startswith("tenant_")
+    assert "migration" not in org
+    assert "org_acme" not in database.collections
+    assert {doc["i"] async for doc in database[org["collection_name"]].find({})} == expected
+    user = await database["users"].find_one({"email": "admin@acme.com"})
+    assert user["org_id"] == org["_id"] and "org_name" not in user
+
+
+@pytest.mark.parametrize("persisted, frozen", [
+    ("freeze", True), ("copy", True), ("verify", True), ("cleanup", False),
+])
+async def test_resumes_from_each_phase(memory_db, monkeypatch, persisted, frozen):
+    org = await _legacy_tenant(memory_db)
+    if persisted == "freeze":
+        # Nothing records "freeze" through set_phase; fail on the way to "copy"
+        _crash_when_persisting(monkeypatch, "copy", after=False)
+    else:
+        _crash_when_persisting(monkeypatch, persisted)
+
+    with pytest.raises(Crash):
+        await migrate_tenants.migrate_org(org, batch_size=3, grace=0)
+    monkeypatch.undo()
+
+    stored = await memory_db["organizations"].find_one({"_id": org["_id"]})
+    assert stored["migration"]["phase"] == persisted
+    assert writes_frozen(stored) is frozen
+
+    await migrate_tenants.migrate_all(batch_size=3, grace=0)
+    await _assert_migrated(memory_db, set(range(7)))
+
+
+async def test_resumes_an_interrupted_copy_from_the_checkpoint(memory_db, monkeypatch):
+    org = await _legacy_tenant(memory_db)
+    original = batch_copy.copy_in_batches
+    batches = []
+
+    async def copy_then_crash(source, target, after, batch_size, checkpoint):
+        async def crash_after_first(last_id):
+            await checkpoint(last_id)
+            batches.append(last_id)
+            raise Crash("copy")
+        return await original(source, target, after, batch_size, crash_after_first)
+
+    monkeypatch.setattr(batch_copy, "copy_in_batches", copy_then_crash)
+    with pytest.raises(Crash):
+        await migrate_tenants.migrate_org(org, batch_size=3, grace=0)
+    monkeypatch.undo()
+
+    stored = await memory_db["organizations"].find_one({"_id": org["_id"]})
+    assert stored["migration"]["last_id"] == batches[0]
+
+    await migrate_tenants.migrate_all(batch_size=3, grace=0)
+    await _assert_migrated(memory_db, set(range(7)))
+
+
+async def test_verify_reconciles_writes_the_copy_missed(memory_db, monkeypatch):
+    org = await _legacy_tenant(memory_db)
+    _crash_when_persisting(monkeypatch, "verify")
+    with pytest.raises(Crash):
+        await migrate_tenants.migrate_org(org, batch_size=3, grace=0)
+    monkeypatch.undo()
+
+    # What a straggling writer could leave behind: an insert whose ObjectId sorts
+    # below the copy checkpoint (another process's clock), and a delete
+    source = memory_db["org_acme"]
+    await source.insert_one({"_id": ObjectId("000000000000000000000001"), "i": 100})
+    await source.delete_one({"i": 0})
+
+    await migrate_tenants.migrate_all(batch_size=3, grace=0)
+    await _assert_migrated(memory_db, set(range(1, 7)) | {100})
+
+
+async def test_removes_only_the_exact_legacy_placeholder(memory_db):
+    await memory_db["organizations"].insert_one({"name": "old", "collection_name": "tenant_old"})
+    await memory_db["organizations"].insert_one({"name": "lookalike", "collection_name": "tenant_lookalike"})
+    await memory_db["organizations"].insert_one({"name": "new", "collection_name": "tenant_new"})
+    await memory_db["tenant_old"].insert_one({"info": "tenant_initialized"})
+    await memory_db["tenant_old"].insert_one({"info": "tenant_initialized", "note": "mine"})
+    await memory_db["tenant_lookalike"].insert_one({"info": "tenant_initialized", "note": "mine"})
+    await memory_db["tenant_new"].insert_one({"note": "mine"})
+    await memory_db["tenant_new"].insert_one({"info": "tenant_initialized"})
+
+    assert await migrate_tenants.remove_placeholders(dry_run=True) == 1
+    assert await memory_db["tenant_old"].count_documents({}) == 2
+    assert await migrate_tenants.remove_placeholders() == 1
+    assert await migrate_tenants.remove_placeholders() == 0
+    # Only the first document, and only when it has no other fields, is the placeholder
+    assert [doc.get("note") async for doc in memory_db["tenant_old"].find({})] == ["mine"]
+    assert await memory_db["tenant_lookalike"].count_documents({}) == 1
+    assert await memory_db["tenant_new"].count_documents({}) == 2
+
+
+async def test_migrates_in_batches_with_one_grace_wait_per_phase(memory_db, monkeypatch):
+    for n in range(5):
+        await memory_db["organizations"].insert_one({"name": f"org{n}", "collection_name": f"org_org{n}"})
+        await memory_db[f"org_org{n}"].insert_one({"n": n})
+    sleeps = []
+
+    async def sleep(seconds):
+        if seconds:  # the in-memory backend's zero latency sleeps too
+            sleeps.append(seconds)
+
+    monkeypatch.setattr(batch_copy.asyncio, "sleep", sleep)
+    assert await migrate_tenants.migrate_all(batch_size=10, grace=30, tenants_per_batch=2) == 5
+    # Three batches (2, 2, 1), each waiting once to freeze and once before cleanup
+    assert sleeps == [30] * 6
+    async for org in memory_db["organizations"].find({}):
+        assert org["collection_name"].startswith("tenant_") and "migration" not in org
+        assert (await memory_db[org["collection_name"]].find_one({}))["n"] == int(org["name"][3:])
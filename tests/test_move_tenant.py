@@ -0,0 +1,52 @@
+import pytest
+
+from app.db.batch_copy import CollectionMove
+from app.db.move_tenant import move_tenant
+from app.db.tenants import writes_frozen
+
+pytestmark = pytest.mark.anyio
+
+
+class Crash(Exception):
+    pass
+
+
+async def _tenant(database, docs: int = 5) -> dict:
+    await database["organizations"].insert_one({"name": "acme", "collection_name": "tenant_acme"})
+    for i in range(docs):
+        await database["tenant_acme"].insert_one({"i": i})
+    return await database["organizations"].find_one({"name": "acme"})
+
+
+async def test_move_resumes_after_a_crash_and_switches_the_cluster(memory_db, cluster_b, monkeypatch):
+    org = await _tenant(memory_db)
+    original = CollectionMove.set_phase
+
+    async def crash_on_cleanup(move, phase, extra=None):
+        if phase == "cleanup":
+            raise Crash(phase)
+        await original(move, phase, extra)
+
+    with monkeypatch.context() as patch, pytest.raises(Crash):
+        patch.setattr(CollectionMove, "set_phase", crash_on_cleanup)
+        await move_tenant(org, "cluster_b", batch_size=2, grace=0)
+
+    stored = await memory_db["organizations"].find_one({"name": "acme"})
+    assert stored["cluster_move"]["phase"] == "verify" and writes_frozen(stored)
+    assert "connection_uri" not in stored
+
+    await move_tenant(stored, "cluster_b", batch_size=2, grace=0)
+    stored = await memory_db["organizations"].find_one({"name": "acme"})
+    assert stored["connection_uri"] == "cluster_b"
+    assert "cluster_move" not in stored
+    assert "tenant_acme" not in memory_db.collections
+    assert {doc["i"] async for doc in cluster_b["tenant_acme"].find({})} == set(range(5))
+
+
+async def test_move_refuses_unknown_clusters_and_a_different_unfinished_move(memory_db, cluster_b):
+    org = await _tenant(memory_db)
+    with pytest.raises(ValueError, match="Unknown cluster"):
+        await move_tenant(org, "cluster_c", batch_size=2, grace=0)
+    org["cluster_move"] = {"source": "default_cluster", "target": "cluster_b", "phase": "copy", "last_id": None}
+    with pytest.raises(ValueError, match="unfinished move"):
+        await move_tenant(org, "default_cluster", batch_size=2, grace=0)
@@ -0,0 +1,53 @@
+import pytest
+
+from app.db.tenants import tenants
+from app.services.job_service import job_queue
+from app.services.org_service import OrganizationService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _me(client, headers, if_none_match=None):
+    if if_none_match is not None:
+        headers = {**headers, "If-None-Match": if_none_match}
+    return await client.get("/organizations/me", headers=headers)
+
+
+async def test_matching_if_none_match_gets_304_from_the_cache(client, auth_headers, memory_db, monkeypatch):
+    first = await _me(client, auth_headers)
+    assert first.status_code == 200 and first.json()["name"] == "acme"
+    etag = first.headers["ETag"]
+
+    async def no_reads(*args, **kwargs):
+        raise AssertionError("metadata read from the database")
+
+    monkeypatch.setattr(memory_db["organizations"], "find_one", no_reads)
+    for tag in (etag, f"W/{etag}", f'"stale", W/{etag}', "*"):
+        response = await _me(client, auth_headers, tag)
+        assert response.status_code == 304, tag
+        assert response.headers["ETag"] == etag and response.content == b""
+    response = await _me(client, auth_headers, '"stale"')
+    assert response.status_code == 200 and response.content == first.content
+
+
+async def test_rename_changes_etag_and_body(client, auth_headers):
+    before = await _me(client, auth_headers)
+    assert (await client.put("/organizations/me", json={"name": "acme-2"}, headers=auth_headers)).status_code == 200
+
+    after = await _me(client, auth_headers, before.headers["ETag"])
+    assert after.status_code == 200
+    assert after.json()["name"] == "acme-2"
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+
+async def test_delete_job_drops_the_cached_view(client, auth_headers, memory_db):
+    await _me(client, auth_headers)
+    org = await memory_db["organizations"].find_one({"name": "acme"})
+    assert tenants._views.get(org["_id"]) is not None
+
+    assert (await client.delete("/organizations/me", headers=auth_headers)).status_code == 202
+    job_queue.register("delete_organization", OrganizationService.deletion_steps)
+    await job_queue._run(await job_queue._claim())
+
+    assert tenants._views.get(org["_id"]) is None
+    assert await tenants.get_org_view(org["_id"]) is None
@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.config import settings
+from app.db import placement
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def configure(monkeypatch):
+    """Set placement settings and rebuild the policy from them."""
+    def apply(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        monkeypatch.setattr(placement, "_policy", None)
+    return apply
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"TENANT_PLACEMENT": "pinned", "TENANT_PLACEMENT_PIN": "cluster_typo"}, "TENANT_PLACEMENT_PIN"),
+    ({"TENANT_PLACEMENT": "round_robin"}, "Unknown TENANT_PLACEMENT"),
+])
+def test_misconfigured_policy_is_rejected_when_built(configure, overrides, message):
+    configure(**overrides)
+    with pytest.raises(ValueError, match=message):
+        placement.get_placement_policy()
+
+
+async def test_policies_only_place_on_configured_clusters(memory_db, cluster_b, configure):
+    for policy in ("pinned", "hash", "least_loaded"):
+        configure(TENANT_PLACEMENT=policy, TENANT_PLACEMENT_PIN="cluster_b")
+        assert await placement.place_tenant("acme") in {"default_cluster", "cluster_b"}
+
+
+async def test_no_org_is_saved_for_a_cluster_that_cannot_be_resolved(client, memory_db, configure, monkeypatch):
+    configure()
+
+    class Typo(placement.PlacementPolicy):
+        async def choose(self, org_name):
+            return "cluster_typo"
+
+    monkeypatch.setattr(placement, "_policy", Typo())
+    response = await client.post("/organizations", json={
+        "name": "acme", "email": "admin@acme.com", "password": "password123",
+    })
+    assert response.status_code == 500
+    assert await memory_db["organizations"].count_documents({}) == 0
+    assert await memory_db["users"].count_documents({}) == 0
@@ -0,0 +1,173 @@
+import httpx
+import pytest
+
+from app.core import ratelimit
+from app.core.config import settings
+from app.core.ratelimit import ConcurrencyLimiter, TokenBucketLimiter, retry_after_header
+from app.db.tenants import tenants
+from app.dependencies import ip_limiter, tenant_concurrency, tenant_limiter
+from app.main import app
+from app.routers import tenant_data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", fake)
+    return fake
+
+
+def test_bucket_allows_burst_then_refills_at_rate(clock):
+    limiter = TokenBucketLimiter("test", rate=2.0, burst=3, maxsize=10)
+    assert [limiter.acquire("k") for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty: the next token is 1/rate seconds away
+    assert limiter.acquire("k") == pytest.approx(0.5)
+    clock.now += 0.25
+    assert limiter.acquire("k") == pytest.approx(0.25)
+    clock.now += 0.25
+    assert limiter.acquire("k") == 0.0
+    # Refill is capped at the burst size
+    clock.now += 60
+    assert [limiter.acquire("k") for _ in range(4)][-1] > 0
+
+
+def test_buckets_are_per_key_and_lru_bounded(clock):
+    limiter = TokenBucketLimiter("test", rate=1.0, burst=1, maxsize=2)
+    assert limiter.acquire("a") == 0.0
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0.0
+    limiter.acquire("a")  # touch "a" so "b" is the least recently used
+    assert limiter.acquire("c") == 0.0
+    assert limiter.stats() == {"keys": 2, "maxsize": 2, "evictions": 1}
+    # "a" kept its (empty) bucket; evicted "b" starts over full
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0.0
+
+
+def test_zero_rate_disables_the_bucket(clock):
+    limiter = TokenBucketLimiter("test", rate=0, burst=0, maxsize=10)
+    assert all(limiter.acquire("k") == 0.0 for _ in range(100))
+    assert limiter.stats()["keys"] == 0
+
+
+def test_retry_after_rounds_up_to_whole_seconds():
+    assert retry_after_header(0.01) == {"Retry-After": "1"}
+    assert retry_after_header(1.2) == {"Retry-After": "2"}
+
+
+def test_concurrency_limiter_caps_and_forgets_idle_keys():
+    limiter = ConcurrencyLimiter("test", limit=2)
+    assert limiter.try_acquire("t") and limiter.try_acquire("t")
+    assert not limiter.try_acquire("t")
+    assert limiter.try_acquire("other")
+    limiter.release("t")
+    assert limiter.try_acquire("t")
+    for key in ("t", "t", "other"):
+        limiter.release(key)
+    assert limiter.stats() == {"keys": 0, "in_flight": 0}
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Fresh limiter state with small limits; restored afterwards."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(ip_limiter, "rate", 1.0)
+    monkeypatch.setattr(ip_limiter, "burst", 3)
+    monkeypatch.setattr(tenant_limiter, "rate", 1000.0)
+    monkeypatch.setattr(tenant_limiter, "burst", 1000)
+    monkeypatch.setattr(tenant_concurrency, "limit", 2)
+    for limiter in (ip_limiter, tenant_limiter):
+        monkeypatch.setattr(limiter, "_buckets", type(limiter._buckets)())
+    monkeypatch.setattr(tenant_concurrency, "_in_flight", {})
+
+
+@pytest.fixture
+async def client(memory_db, limits):
+    # Unhandled errors come back as the app's 500 instead of being re-raised here
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def _tenant_headers(client) -> dict:
+    credentials = {"email": "admin@acme.com", "password": "password123"}
+    assert (await client.post("/organizations", json={"name": "acme", **credentials})).status_code == 201
+    login = await client.post("/admin/login", json=credentials)
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.mark.anyio
+async def test_login_is_limited_per_ip_with_retry_after(client):
+    # The org creation spends one token of the burst of 3
+    await _tenant_headers(client)
+    response = await client.post("/admin/login", json={"email": "admin@acme.com", "password": "wrong-password"})
+    assert response.status_code == 401
+    response = await client.post("/admin/login", json={"email": "admin@acme.com", "password": "password123"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.anyio
+async def test_concurrency_slot_is_released_on_errors(client):
+    headers = await _tenant_headers(client)
+    assert (await client.get("/tenant/documents/not-an-id", headers=headers)).status_code == 404
+    assert (await client.get("/tenant/documents?after=bogus", headers=headers)).status_code == 400
+    assert (await client.post("/tenant/documents", content=b"[1]", headers=headers)).status_code == 422
+    assert tenant_concurrency.stats() == {"keys": 0, "in_flight": 0}
+
+
+@pytest.mark.anyio
+async def test_concurrency_slot_is_released_on_unhandled_exceptions(client, monkeypatch):
+    headers = await _tenant_headers(client)
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(tenants, "org_for_user", broken)
+    response = await client.get("/tenant/documents", headers=headers)
+    assert response.status_code == 500
+    assert tenant_concurrency.stats() == {"keys": 0, "in_flight": 0}
+
+
+@pytest.mark.anyio
+async def test_concurrency_slot_is_held_while_streaming_and_released_after(client, monkeypatch):
+    headers = await _tenant_headers(client)
+    for i in range(5):
+        await client.post("/tenant/documents", json={"i": i}, headers=headers)
+
+    # Record the tenant's in-flight count as each export line is produced
+    in_flight_while_streaming = []
+    original = tenant_data.dumps_line
+
+    def dumps_line(obj):
+        in_flight_while_streaming.append(tenant_concurrency.stats()["in_flight"])
+        return original(obj)
+
+    monkeypatch.setattr(tenant_data, "dumps_line", dumps_line)
+    async with client.stream("GET", "/tenant/export", headers=headers) as response:
+        lines = [line async for line in response.aiter_lines() if line]
+    assert len(lines) == 5
+    assert in_flight_while_streaming == [1] * 5
+    assert tenant_concurrency.stats() == {"keys": 0, "in_flight": 0}
+
+
+@pytest.mark.anyio
+async def test_requests_over_the_tenant_cap_get_429(client, memory_db):
+    headers = await _tenant_headers(client)
+    # Two requests already in flight for this tenant
+    key = (await memory_db["users"].find_one({"email": "admin@acme.com"}))["org_id"]
+    assert tenant_concurrency.try_acquire(key) and tenant_concurrency.try_acquire(key)
+    response = await client.get("/tenant/documents", headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    tenant_concurrency.release(key)
+    assert (await client.get("/tenant/documents", headers=headers)).status_code == 200
+    tenant_concurrency.release(key)
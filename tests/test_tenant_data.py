@@ -0,0 +1,21 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_documents_that_look_like_the_legacy_placeholder_are_ordinary_data(client, auth_headers):
+    doc = {"info": "tenant_initialized", "note": "mine"}
+    created = await client.post("/tenant/documents", json=doc, headers=auth_headers)
+    assert created.status_code == 201
+    doc_id = created.json()["_id"]
+
+    assert (await client.get(f"/tenant/documents/{doc_id}", headers=auth_headers)).json() == {"_id": doc_id, **doc}
+    listed = await client.get("/tenant/documents", headers=auth_headers)
+    assert [item["_id"] for item in listed.json()["items"]] == [doc_id]
+    assert (await client.delete(f"/tenant/documents/{doc_id}", headers=auth_headers)).status_code == 200
+
+
+async def test_malformed_after_cursor_is_rejected(client, auth_headers):
+    response = await client.get("/tenant/documents?after=bogus", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid 'after' cursor"